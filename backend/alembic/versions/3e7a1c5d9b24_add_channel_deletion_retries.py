@@ -0,0 +1,38 @@
+"""Add retry backoff and pending file list to channel_deletions
+
+Revision ID: 3e7a1c5d9b24
+Revises: f52d9b6e0a18
+Create Date: 2026-10-19 20:14:52.730611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7a1c5d9b24'
+down_revision: Union[str, Sequence[str], None] = 'f52d9b6e0a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('channel_deletions', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column(
+        'channel_deletions',
+        sa.Column(
+            'next_attempt_at', sa.DateTime(),
+            server_default=sa.text("timezone('utc', now())"), nullable=False,
+        ),
+    )
+    op.add_column('channel_deletions', sa.Column('pending_files', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('channel_deletions', 'pending_files')
+    op.drop_column('channel_deletions', 'next_attempt_at')
+    op.drop_column('channel_deletions', 'attempts')
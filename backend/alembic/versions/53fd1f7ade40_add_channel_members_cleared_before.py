@@ -0,0 +1,28 @@
+"""Add cleared_before watermark to channel_members
+
+Revision ID: 53fd1f7ade40
+Revises: a2711df43265
+Create Date: 2026-10-19 10:41:52.318604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '53fd1f7ade40'
+down_revision: Union[str, Sequence[str], None] = 'a2711df43265'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('channel_members', sa.Column('cleared_before', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('channel_members', 'cleared_before')
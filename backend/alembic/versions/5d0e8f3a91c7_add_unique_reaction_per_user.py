@@ -0,0 +1,40 @@
+"""Make reactions unique per (message_id, user_id, emoji)
+
+Revision ID: 5d0e8f3a91c7
+Revises: e3b1c97d52a4
+Create Date: 2026-10-19 14:31:07.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0e8f3a91c7'
+down_revision: Union[str, Sequence[str], None] = 'e3b1c97d52a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the oldest of any duplicates before adding the constraint
+    op.execute("""
+        DELETE FROM reactions r
+        USING reactions older
+        WHERE r.message_id = older.message_id
+          AND r.user_id = older.user_id
+          AND r.emoji = older.emoji
+          AND (older.created_at, older.id) < (r.created_at, r.id)
+    """)
+    # Also serves the per-message grouped counts (message_id prefix)
+    op.create_unique_constraint(
+        'uq_reactions_message_id_user_id_emoji', 'reactions', ['message_id', 'user_id', 'emoji'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_reactions_message_id_user_id_emoji', 'reactions', type_='unique')
@@ -0,0 +1,47 @@
+"""Add append-only change_log for client sync
+
+Revision ID: 66fef5ea41ce
+Revises: 72bc6b3b36de
+Create Date: 2026-10-19 13:15:50.443871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66fef5ea41ce'
+down_revision: Union[str, Sequence[str], None] = '72bc6b3b36de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column(
+            'txid', sa.BigInteger(),
+            server_default=sa.text('pg_current_xact_id()::text::bigint'),
+            nullable=False,
+        ),
+        sa.Column('channel_id', sa.UUID(), nullable=False),
+        sa.Column('kind', sa.String(length=40), nullable=False),
+        sa.Column('entity_id', sa.UUID(), nullable=True),
+        sa.Column('user_id', sa.UUID(), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_change_log_txid_id', 'change_log', ['txid', 'id'])
+    op.create_index('ix_change_log_channel_id_txid', 'change_log', ['channel_id', 'txid'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_change_log_channel_id_txid', table_name='change_log')
+    op.drop_index('ix_change_log_txid_id', table_name='change_log')
+    op.drop_table('change_log')
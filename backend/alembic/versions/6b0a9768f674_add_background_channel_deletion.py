@@ -0,0 +1,48 @@
+"""Add channel tombstones and background deletion jobs
+
+Revision ID: 6b0a9768f674
+Revises: 53fd1f7ade40
+Create Date: 2026-10-19 11:26:08.907115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b0a9768f674'
+down_revision: Union[str, Sequence[str], None] = '53fd1f7ade40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('channels', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_messages_file_url', 'messages', ['file_url'])
+    op.create_table(
+        'channel_deletions',
+        sa.Column('channel_id', sa.UUID(), nullable=False),
+        sa.Column('workspace_id', sa.UUID(), nullable=True),
+        sa.Column('requested_by', sa.UUID(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('phase', sa.String(length=30), nullable=False),
+        sa.Column('rows_deleted', sa.Integer(), nullable=False),
+        sa.Column('files_deleted', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id']),
+        sa.ForeignKeyConstraint(['requested_by'], ['users.id']),
+        sa.PrimaryKeyConstraint('channel_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('channel_deletions')
+    op.drop_index('ix_messages_file_url', table_name='messages')
+    op.drop_column('channels', 'deleted_at')
@@ -0,0 +1,30 @@
+"""Add (channel_id, created_at) index on messages
+
+Revision ID: 72bc6b3b36de
+Revises: 9cfc7d88b26d
+Create Date: 2026-10-19 12:37:19.025518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '72bc6b3b36de'
+down_revision: Union[str, Sequence[str], None] = '9cfc7d88b26d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_messages_channel_id_created_at', 'messages', ['channel_id', 'created_at'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_channel_id_created_at', table_name='messages')
@@ -0,0 +1,34 @@
+"""Add per-member last-read markers and unread counters
+
+Revision ID: 9cfc7d88b26d
+Revises: 6b0a9768f674
+Create Date: 2026-10-19 12:02:44.671230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9cfc7d88b26d'
+down_revision: Union[str, Sequence[str], None] = '6b0a9768f674'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('channel_members', sa.Column('last_read_message_at', sa.DateTime(), nullable=True))
+    op.add_column('channel_members', sa.Column(
+        'unread_count', sa.Integer(), server_default='0', nullable=False
+    ))
+    op.create_index('ix_channel_members_channel_id', 'channel_members', ['channel_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_channel_members_channel_id', table_name='channel_members')
+    op.drop_column('channel_members', 'unread_count')
+    op.drop_column('channel_members', 'last_read_message_at')
@@ -0,0 +1,38 @@
+"""Add trigram index on channel names and membership lookup index
+
+Revision ID: a2711df43265
+Revises: ad82326c0dd1
+Create Date: 2026-10-19 10:03:17.552981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2711df43265'
+down_revision: Union[str, Sequence[str], None] = 'ad82326c0dd1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_channels_name_trgm', 'channels', ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_channel_members_user_id_channel_id', 'channel_members',
+        ['user_id', 'channel_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_channel_members_user_id_channel_id', table_name='channel_members')
+    op.drop_index('ix_channels_name_trgm', table_name='channels')
@@ -0,0 +1,57 @@
+"""Add full-text search vectors to messages and ideas
+
+Revision ID: ad82326c0dd1
+Revises: a60c1ea66e69
+Create Date: 2026-10-19 09:12:41.104233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ad82326c0dd1'
+down_revision: Union[str, Sequence[str], None] = 'a60c1ea66e69'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('messages', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "to_tsvector('english', coalesce(content, '') || ' ' || coalesce(file_name, ''))",
+            persisted=True,
+        ),
+    ))
+    op.create_index(
+        'ix_messages_search_vector', 'messages', ['search_vector'],
+        postgresql_using='gin',
+    )
+
+    op.add_column('ideas', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    ))
+    op.create_index(
+        'ix_ideas_search_vector', 'ideas', ['search_vector'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ideas_search_vector', table_name='ideas')
+    op.drop_column('ideas', 'search_vector')
+    op.drop_index('ix_messages_search_vector', table_name='messages')
+    op.drop_column('messages', 'search_vector')
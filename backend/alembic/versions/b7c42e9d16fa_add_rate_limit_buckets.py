@@ -0,0 +1,37 @@
+"""Add UNLOGGED rate_limit_buckets for the shared rate limiter
+
+Revision ID: b7c42e9d16fa
+Revises: 5d0e8f3a91c7
+Create Date: 2026-10-19 16:12:38.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c42e9d16fa'
+down_revision: Union[str, Sequence[str], None] = '5d0e8f3a91c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Bucket state is disposable: skip WAL for one upsert per limited request
+    op.create_table(
+        'rate_limit_buckets',
+        sa.Column('key', sa.String(length=200), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('allowed', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+        prefixes=['UNLOGGED'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,48 @@
+"""Denormalize ideas.workspace_id and add Ideas Hub indexes
+
+Revision ID: c4e8a2f71b93
+Revises: b7c42e9d16fa
+Create Date: 2026-10-19 17:05:42.318260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f71b93'
+down_revision: Union[str, Sequence[str], None] = 'b7c42e9d16fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ideas', sa.Column('workspace_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('ideas_workspace_id_fkey', 'ideas', 'workspaces', ['workspace_id'], ['id'])
+    op.execute("""
+        UPDATE ideas i
+        SET workspace_id = c.workspace_id
+        FROM channels c
+        WHERE c.id = i.channel_id
+    """)
+    op.create_index(
+        'ix_ideas_workspace_id_created_at', 'ideas', ['workspace_id', 'created_at', 'id'],
+    )
+    op.create_index(
+        'ix_ideas_workspace_id_status_created_at', 'ideas', ['workspace_id', 'status', 'created_at', 'id'],
+    )
+    op.create_index(
+        'ix_ideas_channel_id_status_created_at', 'ideas', ['channel_id', 'status', 'created_at'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ideas_channel_id_status_created_at', table_name='ideas')
+    op.drop_index('ix_ideas_workspace_id_status_created_at', table_name='ideas')
+    op.drop_index('ix_ideas_workspace_id_created_at', table_name='ideas')
+    op.drop_constraint('ideas_workspace_id_fkey', 'ideas', type_='foreignkey')
+    op.drop_column('ideas', 'workspace_id')
@@ -0,0 +1,28 @@
+"""Add channel_members.last_delivered_at for delivery receipts
+
+Revision ID: e3b1c97d52a4
+Revises: 66fef5ea41ce
+Create Date: 2026-10-19 14:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b1c97d52a4'
+down_revision: Union[str, Sequence[str], None] = '66fef5ea41ce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('channel_members', sa.Column('last_delivered_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('channel_members', 'last_delivered_at')
@@ -0,0 +1,35 @@
+"""Add cache_versions shared by every worker's response cache
+
+Revision ID: f52d9b6e0a18
+Revises: c4e8a2f71b93
+Create Date: 2026-10-19 18:41:07.219853
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f52d9b6e0a18'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a2f71b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Logged on purpose: counters reset by a crash would revive cached bodies
+    op.create_table(
+        'cache_versions',
+        sa.Column('namespace', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.UUID(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('namespace', 'entity_id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cache_versions')
@@ -1,16 +1,24 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import uuid
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from .cache import TTLCache
 from .config import settings
 from .database import get_db
 from .models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+# Ids of users recently seen to exist, so get_current_user_id checks once per TTL
+known_users = TTLCache(
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
 def _truncate_password(password: str) -> str:
     """Truncate password to 72 bytes to comply with bcrypt limit."""
     password_bytes = password.encode('utf-8')
@@ -62,6 +70,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def get_user_from_token(token: str, db: Session) -> Optional[User]:
+    """Resolve a bearer token to its user, or None (for callers that can't raise HTTP errors, e.g. WebSockets)."""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+    return db.query(User).filter(User.id == user_id).first()
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -84,3 +103,30 @@ def get_current_user(
         raise credentials_exception
     return user
 
+
+def get_current_user_id(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> uuid.UUID:
+    """
+    The caller's id from a valid token, without loading the user. For
+    cached reads: the user's existence is checked with an id-only query at
+    most once per AUTH_USER_CACHE_TTL_SECONDS, so a deleted user's tokens
+    stop working within that window.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        user_id = uuid.UUID(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        raise credentials_exception
+
+    if known_users.get(user_id) is None:
+        if db.query(User.id).filter(User.id == user_id).first() is None:
+            raise credentials_exception
+        known_users.set(user_id, True)
+    return user_id
@@ -0,0 +1,323 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, or_, tuple_
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Optional
+import threading
+import uuid
+
+from .config import settings
+from .database import SessionLocal
+from .models import (
+    User,
+    Channel,
+    Message,
+    Reaction,
+    Idea,
+    CalendarEvent,
+    HiddenMessage,
+    ChannelMember,
+    ChannelDeletion,
+)
+from .upload import UPLOAD_DIR
+from .sync_service import SyncService
+from . import sync_service as sync
+from .http_cache import versions, CHANNELS, IDEAS, CALENDAR, MEMBERS
+
+# Order matters: every phase only removes rows nothing later still points at.
+PHASES = [
+    "memberships",
+    "calendar_events",
+    "ideas",
+    "hidden_messages",
+    "reactions",
+    "messages",
+    "channel",
+]
+
+
+class ChannelCleanupService:
+
+    @staticmethod
+    def request_deletion(db: Session, channel: Channel, user_id: uuid.UUID) -> ChannelDeletion:
+        """Tombstone the channel and queue its rows for background removal"""
+        job = db.query(ChannelDeletion).filter(ChannelDeletion.channel_id == channel.id).first()
+        if job:
+            if job.status == "failed":
+                # Asking again retries a job that gave up
+                job.status = "pending"
+                job.attempts = 0
+                job.next_attempt_at = datetime.utcnow()
+                db.commit()
+                db.refresh(job)
+            return job
+
+        channel.deleted_at = datetime.now()
+
+        # users.channel_id references channels; detach it before the channel goes
+        db.query(User).filter(User.channel_id == channel.id).update(
+            {User.channel_id: None},
+            synchronize_session=False
+        )
+
+        SyncService.record(db, channel.id, sync.CHANNEL_DELETED, channel.id, user_id)
+        # Tombstoned channels drop out of lists and idea boards right away
+        versions.bump(
+            db, (CHANNELS, channel.workspace_id), (IDEAS, channel.workspace_id), (MEMBERS, channel.id),
+        )
+
+        job = ChannelDeletion(
+            channel_id=channel.id,
+            workspace_id=channel.workspace_id,
+            requested_by=user_id,
+            status="pending",
+            phase=PHASES[0],
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def run_batch(db: Session, batch_size: int) -> bool:
+        """
+        Claim one unfinished job that is due and advance it by at most one
+        batch. Progress is committed with the deleted rows, so a crashed
+        worker resumes from the last committed batch; a failing job backs
+        off instead of being claimed ahead of the others on every pass.
+        Returns False when idle.
+        """
+        job = (
+            db.query(ChannelDeletion)
+            .filter(
+                ChannelDeletion.status.in_(["pending", "running"]),
+                ChannelDeletion.next_attempt_at <= datetime.utcnow(),
+            )
+            .order_by(ChannelDeletion.next_attempt_at, ChannelDeletion.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            db.rollback()
+            return False
+
+        channel_id = job.channel_id
+        if job.pending_files:
+            # A previous run committed a batch but stopped before unlinking its files
+            ChannelCleanupService._remove_pending_files(db, job)
+            return True
+
+        job.status = "running"
+        file_urls = set()
+
+        try:
+            deleted = ChannelCleanupService._delete_batch(db, job, batch_size, file_urls)
+        except Exception as e:
+            db.rollback()
+            ChannelCleanupService._record_error(db, channel_id, e)
+            raise
+
+        job.rows_deleted += deleted
+        phase, workspace_id = job.phase, job.workspace_id
+        if deleted == 0 or job.phase == "channel":
+            next_index = PHASES.index(job.phase) + 1
+            if next_index < len(PHASES):
+                job.phase = PHASES[next_index]
+            else:
+                job.status = "completed"
+                job.completed_at = datetime.utcnow()
+        job.last_error = None
+        job.attempts = 0
+        # Recorded with the deleted rows; unlinked below, or on resume after a crash
+        job.pending_files = sorted(file_urls) or None
+        # Calendar events are listed by workspace without a tombstone check
+        if deleted and phase == "calendar_events" and workspace_id:
+            versions.bump(db, (CALENDAR, workspace_id))
+        elif deleted and phase == "memberships":
+            versions.bump(db, (MEMBERS, channel_id))
+        db.commit()
+
+        # Blobs are removed only after the rows are gone for good
+        if job.pending_files:
+            ChannelCleanupService._remove_pending_files(db, job)
+
+        return True
+
+    @staticmethod
+    def _remove_pending_files(db: Session, job: ChannelDeletion):
+        removed = ChannelCleanupService._delete_orphaned_files(db, set(job.pending_files))
+        job.files_deleted += removed
+        job.pending_files = None
+        db.commit()
+
+    @staticmethod
+    def _delete_batch(db: Session, job: ChannelDeletion, batch_size: int, file_urls: set) -> int:
+        channel_id = job.channel_id
+        channel_message_ids = select(Message.id).where(Message.channel_id == channel_id)
+
+        if job.phase == "memberships":
+            members = db.execute(
+                select(ChannelMember.id, ChannelMember.user_id)
+                .where(ChannelMember.channel_id == channel_id)
+                .limit(batch_size)
+            ).all()
+            if not members:
+                return 0
+            # Former members learn about the removal through /sync
+            for member in members:
+                SyncService.record(
+                    db, channel_id, sync.MEMBER_LEFT, member.user_id, job.requested_by,
+                    {"reason": "channel_deleted"},
+                )
+            return db.query(ChannelMember).filter(
+                ChannelMember.id.in_([member.id for member in members])
+            ).delete(synchronize_session=False)
+
+        if job.phase == "calendar_events":
+            ids = select(CalendarEvent.id).join(Idea, CalendarEvent.idea_id == Idea.id).where(
+                or_(Idea.channel_id == channel_id, Idea.message_id.in_(channel_message_ids))
+            ).limit(batch_size)
+            return db.query(CalendarEvent).filter(
+                CalendarEvent.id.in_(ids)
+            ).delete(synchronize_session=False)
+
+        if job.phase == "ideas":
+            ids = select(Idea.id).where(
+                or_(Idea.channel_id == channel_id, Idea.message_id.in_(channel_message_ids))
+            ).limit(batch_size)
+            return db.query(Idea).filter(Idea.id.in_(ids)).delete(synchronize_session=False)
+
+        if job.phase == "hidden_messages":
+            keys = select(HiddenMessage.user_id, HiddenMessage.message_id).where(
+                HiddenMessage.message_id.in_(channel_message_ids)
+            ).limit(batch_size)
+            return db.query(HiddenMessage).filter(
+                tuple_(HiddenMessage.user_id, HiddenMessage.message_id).in_(keys)
+            ).delete(synchronize_session=False)
+
+        if job.phase == "reactions":
+            ids = select(Reaction.id).where(
+                Reaction.message_id.in_(channel_message_ids)
+            ).limit(batch_size)
+            return db.query(Reaction).filter(Reaction.id.in_(ids)).delete(synchronize_session=False)
+
+        if job.phase == "messages":
+            # Newest first, so replies go before the messages they point to
+            rows = db.execute(
+                select(Message.id, Message.file_url)
+                .where(Message.channel_id == channel_id)
+                .order_by(Message.created_at.desc())
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return 0
+            ids = [row.id for row in rows]
+            # Replies posted from other channels survive; they just lose their parent
+            db.query(Message).filter(
+                Message.parent_message_id.in_(ids),
+                Message.channel_id != channel_id,
+            ).update({Message.parent_message_id: None}, synchronize_session=False)
+            file_urls.update(row.file_url for row in rows if row.file_url)
+            return db.query(Message).filter(Message.id.in_(ids)).delete(synchronize_session=False)
+
+        if job.phase == "channel":
+            db.query(User).filter(User.channel_id == channel_id).update(
+                {User.channel_id: None},
+                synchronize_session=False
+            )
+            return db.query(Channel).filter(Channel.id == channel_id).delete(synchronize_session=False)
+
+        raise ValueError(f"Unknown channel deletion phase: {job.phase}")
+
+    @staticmethod
+    def _delete_orphaned_files(db: Session, file_urls: set) -> int:
+        """Unlink uploads no remaining message (e.g. a forward) still points to"""
+        still_used = {
+            url for (url,) in db.query(Message.file_url).filter(Message.file_url.in_(file_urls))
+        }
+        removed = 0
+        for url in file_urls - still_used:
+            if not url.startswith("/uploads/"):
+                continue
+            path = UPLOAD_DIR / Path(url).name
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[CHANNEL_CLEANUP] Could not remove {path}: {e}")
+        return removed
+
+    @staticmethod
+    def _record_error(db: Session, channel_id: uuid.UUID, error: Exception):
+        """Schedule a retry with exponential backoff, or give up after too many"""
+        try:
+            job = db.query(ChannelDeletion).filter(ChannelDeletion.channel_id == channel_id).first()
+            if not job:
+                return
+            job.attempts += 1
+            job.last_error = str(error)[:1000]
+            if job.attempts >= settings.CHANNEL_DELETE_MAX_ATTEMPTS:
+                job.status = "failed"
+            else:
+                delay = min(
+                    settings.CHANNEL_DELETE_RETRY_SECONDS * 2 ** (job.attempts - 1),
+                    settings.CHANNEL_DELETE_RETRY_MAX_SECONDS,
+                )
+                job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            db.commit()
+        except Exception:
+            db.rollback()
+
+
+class ChannelCleanupWorker:
+    """Daemon thread draining channel_deletions one bounded batch at a time."""
+
+    def __init__(self, batch_size: int, poll_interval: float):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="channel-cleanup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wake(self):
+        """Skip the poll wait, e.g. right after a deletion was requested"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            worked = False
+            db = SessionLocal()
+            try:
+                worked = ChannelCleanupService.run_batch(db, self.batch_size)
+            except Exception as e:
+                print(f"[CHANNEL_CLEANUP_ERROR] {e}")
+            finally:
+                db.close()
+
+            if not worked:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+cleanup_worker = ChannelCleanupWorker(
+    batch_size=settings.CHANNEL_DELETE_BATCH_SIZE,
+    poll_interval=settings.CHANNEL_DELETE_POLL_SECONDS,
+)
@@ -0,0 +1,167 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import select, func
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import os
+import time
+
+from .config import settings
+from .database import engine, SessionLocal
+from .models import ChannelDeletion
+from .upload import UPLOAD_DIR
+from .websocket import manager, presence, receipts
+from .channel_cleanup import cleanup_worker
+from . import rate_limit
+
+router = APIRouter()
+
+
+class ReadinessProbe:
+    """
+    Dependency checks behind /health/ready. The DB round trip (a ping plus
+    the deletion queue depth) is cached for `ttl` seconds and shared by
+    concurrent probes, so load balancer polling adds at most one query per
+    worker per TTL. Everything else is read from memory on each call.
+    """
+
+    def __init__(self, ttl: float = 2.0, db_timeout: float = 2.0, pool_saturation_limit: float = 0.9):
+        self.ttl = ttl
+        self.db_timeout = db_timeout
+        self.pool_saturation_limit = pool_saturation_limit
+        self._db_result: Optional[dict] = None
+        self._db_expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def pool_stats() -> dict:
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {"class": type(pool).__name__}
+        size = pool.size()
+        # The pool exposes no getter for its overflow limit; it is built from settings
+        max_overflow = settings.DB_MAX_OVERFLOW
+        # A negative max_overflow means unbounded
+        capacity = size + max_overflow if max_overflow >= 0 else None
+        checked_out = pool.checkedout()
+        return {
+            "size": size,
+            "checked_out": checked_out,
+            "overflow": pool.overflow(),
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        }
+
+    @staticmethod
+    def _ping() -> dict:
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            pending_deletions = db.execute(
+                select(func.count()).select_from(ChannelDeletion).where(ChannelDeletion.status.in_(["pending", "running"]))
+            ).scalar_one()
+            return {
+                "ok": True,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                "pending_channel_deletions": pending_deletions,
+            }
+        finally:
+            db.close()
+
+    async def check_database(self, pool: dict) -> dict:
+        if self._db_result is not None and time.monotonic() < self._db_expires_at:
+            return {**self._db_result, "cached": True}
+
+        async with self._lock:
+            # Another probe may have refreshed it while we waited
+            if self._db_result is not None and time.monotonic() < self._db_expires_at:
+                return {**self._db_result, "cached": True}
+
+            if pool.get("capacity") and pool["checked_out"] >= pool["capacity"]:
+                # A ping would just queue behind the requests holding the pool
+                result = {"ok": False, "error": "connection pool exhausted"}
+            else:
+                try:
+                    result = await asyncio.wait_for(run_in_threadpool(self._ping), self.db_timeout)
+                except asyncio.TimeoutError:
+                    result = {"ok": False, "error": f"ping timed out after {self.db_timeout}s"}
+                except Exception as e:
+                    print(f"[HEALTH_ERROR] database ping failed: {e}")
+                    result = {"ok": False, "error": str(e)[:200]}
+
+            self._db_result = result
+            self._db_expires_at = time.monotonic() + self.ttl
+            return {**result, "cached": False}
+
+    @staticmethod
+    def check_uploads() -> dict:
+        exists = UPLOAD_DIR.is_dir()
+        return {
+            "ok": exists and os.access(UPLOAD_DIR, os.W_OK),
+            "path": str(UPLOAD_DIR),
+            "exists": exists,
+        }
+
+    @staticmethod
+    def queues() -> dict:
+        presence_stats = presence.stats()
+        receipt_stats = receipts.stats()
+        return {
+            "presence_pending_channels": presence_stats["pending_channels"],
+            "presence_pending_last_seen": presence_stats["pending_last_seen"],
+            "receipts_pending": receipt_stats["pending"],
+            "channel_cleanup_worker_alive": cleanup_worker.is_alive(),
+        }
+
+    async def check(self) -> dict:
+        pool = self.pool_stats()
+        database = await self.check_database(pool)
+        uploads = self.check_uploads()
+        pool_ok = pool.get("saturation", 0.0) < self.pool_saturation_limit
+
+        ws = manager.stats()
+        queues = self.queues()
+        if "pending_channel_deletions" in database:
+            queues["channel_deletions_pending"] = database["pending_channel_deletions"]
+
+        checks = {"database": database["ok"], "pool": pool_ok, "uploads": uploads["ok"]}
+        return {
+            "status": "ready" if all(checks.values()) else "degraded",
+            "checks": checks,
+            "database": database,
+            "pool": pool,
+            "uploads": uploads,
+            "websocket": {
+                "connections": ws["connections"],
+                "users": ws["users"],
+                "channels": ws["channels"],
+                "subscriptions": ws["subscriptions"],
+            },
+            "queues": queues,
+            "admission": rate_limit.stats(),
+        }
+
+
+readiness = ReadinessProbe(
+    ttl=settings.HEALTH_CACHE_TTL_SECONDS,
+    db_timeout=settings.HEALTH_DB_TIMEOUT_SECONDS,
+    pool_saturation_limit=settings.HEALTH_POOL_SATURATION_LIMIT,
+)
+
+
+@router.get("/health/live")
+async def liveness():
+    """The process is up and its event loop answers; no dependencies checked"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness_check():
+    """503 when this worker should be taken out of rotation"""
+    report = await readiness.check()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
+
+
+# Kept for existing probes; same as /health/ready
+router.add_api_route("/health", readiness_check, methods=["GET"])
@@ -0,0 +1,158 @@
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import hashlib
+import uuid
+
+from .cache import TTLCache
+from .models import CacheVersion
+
+# Version namespaces; each is paired with the id of the entity it covers
+WORKSPACE = "workspace"  # workspace_id: the workspace row
+CHANNELS = "channels"    # workspace_id: channel lists, badges and previews
+IDEAS = "ideas"          # workspace_id
+CALENDAR = "calendar"    # workspace_id
+MEMBERS = "members"      # channel_id
+
+
+def _key(key: Tuple[str, Hashable]) -> Tuple[str, uuid.UUID]:
+    namespace, entity_id = key
+    return namespace, entity_id if isinstance(entity_id, uuid.UUID) else uuid.UUID(str(entity_id))
+
+
+class VersionRegistry:
+    """
+    Counters in the cache_versions table, bumped by every write that changes
+    a cached view. A bump is part of the write's transaction, so every
+    worker sees the new version exactly when it sees the new rows. A poll
+    whose versions are unchanged costs one primary key lookup instead of
+    rebuilding and serializing the body.
+    """
+
+    def get(self, db: Session, *keys: Tuple[str, Hashable]) -> Tuple[int, ...]:
+        keys = tuple(_key(key) for key in keys)
+        rows = db.execute(
+            select(CacheVersion.namespace, CacheVersion.entity_id, CacheVersion.version)
+            .where(tuple_(CacheVersion.namespace, CacheVersion.entity_id).in_(keys))
+        ).all()
+        found = {(namespace, entity_id): version for namespace, entity_id, version in rows}
+        return tuple(found.get(key, 0) for key in keys)
+
+    def bump(self, db: Session, *keys: Tuple[str, Hashable]):
+        """Add the increments to the caller's transaction; call just before its commit"""
+        # Sorted, so writers bumping overlapping keys lock the rows in the same order
+        keys = sorted({_key(key) for key in keys})
+        if not keys:
+            return
+        statement = pg_insert(CacheVersion).values([
+            {"namespace": namespace, "entity_id": entity_id, "version": 1}
+            for namespace, entity_id in keys
+        ])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[CacheVersion.namespace, CacheVersion.entity_id],
+            set_={"version": CacheVersion.version + 1},
+        ))
+
+
+def _etag(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison: W/ prefixes are ignored
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == wanted:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    Conditional GETs for read-heavy polled endpoints.
+
+    Bodies are serialized once and stored in an LRU keyed by (path, query,
+    user, versions of the entities they depend on); a write bumps a version
+    and so changes the key. The ETag is a hash of the body, so it stays
+    valid across workers and cache evictions, and a client presenting it
+    gets a bodiless 304. Versions are shared through the database, so a
+    write on one worker invalidates every worker's entries; `ttl` only
+    bounds how long unused entries hold memory. With max_entries=0 nothing
+    is stored but ETag/304 still apply.
+    """
+
+    def __init__(self, versions: VersionRegistry, max_entries: int = 2048, ttl: float = 10.0):
+        self.versions = versions
+        self.entries = TTLCache(max_entries=max_entries, ttl=ttl) if max_entries > 0 else None
+        self._adapters: Dict[Any, TypeAdapter] = {}
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def _adapter(self, schema) -> TypeAdapter:
+        adapter = self._adapters.get(schema)
+        if adapter is None:
+            adapter = self._adapters[schema] = TypeAdapter(schema)
+        return adapter
+
+    def respond(
+        self,
+        request: Request,
+        db: Session,
+        user_id,
+        depends_on: Tuple[Tuple[str, Hashable], ...],
+        schema,
+        build: Callable[[], Any],
+    ) -> Response:
+        """
+        Serve `build()` serialized as `schema`, or a 304/cached copy when
+        nothing it `depends_on` changed. Exceptions from build() (404/403)
+        propagate and are never cached.
+        """
+        # Versions are read before building: a write racing the build leaves
+        # the entry under the old key rather than caching stale data as new
+        key = (
+            request.url.path,
+            tuple(sorted(request.query_params.multi_items())),
+            user_id,
+            depends_on,
+            self.versions.get(db, *depends_on),
+        )
+
+        entry = self.entries.get(key) if self.entries is not None else None
+        if entry is None:
+            self.counters["misses"] += 1
+            adapter = self._adapter(schema)
+            body = adapter.dump_json(adapter.validate_python(build(), from_attributes=True))
+            entry = (_etag(body), body)
+            if self.entries is not None:
+                self.entries.set(key, entry)
+        else:
+            self.counters["hits"] += 1
+
+        etag, body = entry
+        headers = {
+            "ETag": etag,
+            # Per-user data: browsers may store it but must revalidate every time
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization",
+        }
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            self.counters["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries) if self.entries is not None else 0,
+            **self.counters,
+        }
+
+
+versions = VersionRegistry()
@@ -1,14 +1,37 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import select, func, tuple_, literal_column, or_
 from .models import Idea, Message, CalendarEvent, Channel
 from .ai_assistant import AIAssistant
+from .sync_service import SyncService
+from . import sync_service as sync
 from datetime import datetime
+import base64
+import json
 import uuid
 
+# Columns counted by get_facets, in GROUPING() argument order
+FACETS = ("status", "category", "priority")
+
 class IdeasService:
-    
+
+    @staticmethod
+    def encode_cursor(created_at: datetime, idea_id: uuid.UUID) -> str:
+        """Opaque keyset cursor pointing just after the given idea"""
+        raw = json.dumps([created_at.isoformat(), str(idea_id)])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Inverse of encode_cursor; raises ValueError on malformed input"""
+        try:
+            created_at, idea_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), uuid.UUID(idea_id)
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+
     @staticmethod
-    def create_idea_from_message(db: Session, message_id: uuid.UUID) -> Idea:
-        """Convert a message into an idea"""
+    def create_idea_from_message(db: Session, message_id: uuid.UUID, actor_id: uuid.UUID = None) -> Idea:
+        """Convert a message into an idea; the change log entry commits with it"""
         message = db.query(Message).filter(Message.id == message_id).first()
         if not message:
             return None
@@ -19,6 +42,7 @@ class IdeasService:
         idea = Idea(
             message_id=message.id,
             channel_id=message.channel_id,
+            workspace_id=db.query(Channel.workspace_id).filter(Channel.id == message.channel_id).scalar(),
             user_id=message.user_id,
             title=ai_result['summary'],
             description=message.content,
@@ -32,6 +56,11 @@ class IdeasService:
         )
         
         db.add(idea)
+        db.flush()
+        SyncService.record(
+            db, idea.channel_id, sync.IDEA_CREATED, idea.id, actor_id,
+            {"message_id": str(message.id)},
+        )
         
         # Update message
         message.ai_processed = True
@@ -78,12 +107,26 @@ class IdeasService:
         return event
     
     @staticmethod
-    def get_all_ideas(db: Session, workspace_id: uuid.UUID, filters: dict = None):
-        """Get all ideas across channels with filters"""
-        query = db.query(Idea).join(Channel).filter(
-            Channel.workspace_id == workspace_id
+    def _visible(workspace_id: uuid.UUID):
+        """
+        Ideas of the workspace, minus those of channels deleted but not yet
+        cleaned up. Few channels are ever in that state, so this is a small
+        hashed NOT IN rather than a join against every channel. NOT IN is
+        never true for a NULL channel_id, hence the explicit branch.
+        """
+        deleted_channels = select(Channel.id).where(
+            Channel.workspace_id == workspace_id,
+            Channel.deleted_at.is_not(None),
         )
-        
+        return (
+            Idea.workspace_id == workspace_id,
+            or_(Idea.channel_id.is_(None), Idea.channel_id.not_in(deleted_channels)),
+        )
+
+    @staticmethod
+    def _filtered(db: Session, workspace_id: uuid.UUID, filters: dict = None):
+        query = db.query(Idea).filter(*IdeasService._visible(workspace_id))
+
         if filters:
             if filters.get('status'):
                 query = query.filter(Idea.status == filters['status'])
@@ -91,6 +134,71 @@ class IdeasService:
                 query = query.filter(Idea.category == filters['category'])
             if filters.get('priority'):
                 query = query.filter(Idea.priority == filters['priority'])
-        
-        return query.order_by(Idea.created_at.desc()).all()
+        return query
+
+    @staticmethod
+    def get_all_ideas(db: Session, workspace_id: uuid.UUID, filters: dict = None):
+        """Get all ideas across channels with filters"""
+        query = IdeasService._filtered(db, workspace_id, filters)
+        return query.order_by(Idea.created_at.desc(), Idea.id.desc()).all()
+
+    @staticmethod
+    def get_ideas_page(
+        db: Session,
+        workspace_id: uuid.UUID,
+        filters: dict = None,
+        cursor: str = None,
+        limit: int = 50,
+    ):
+        """
+        One page of the workspace's ideas, newest first, keyset paginated on
+        (created_at, id). Returns (ideas, next_cursor).
+        """
+        query = IdeasService._filtered(db, workspace_id, filters)
+
+        if cursor:
+            created_at, idea_id = IdeasService.decode_cursor(cursor)
+            query = query.filter(tuple_(Idea.created_at, Idea.id) < tuple_(created_at, idea_id))
+
+        ideas = query.order_by(Idea.created_at.desc(), Idea.id.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(ideas) > limit:
+            ideas = ideas[:limit]
+            last = ideas[-1]
+            next_cursor = IdeasService.encode_cursor(last.created_at, last.id)
+        return ideas, next_cursor
+
+    @staticmethod
+    def get_facets(db: Session, workspace_id: uuid.UUID) -> dict:
+        """
+        Idea counts per status, category and priority plus the total, from
+        one GROUP BY GROUPING SETS scan instead of one query per facet.
+        """
+        columns = [getattr(Idea, name) for name in FACETS]
+        rows = db.execute(
+            select(*columns, func.grouping(*columns), func.count())
+            .where(*IdeasService._visible(workspace_id))
+            .group_by(func.grouping_sets(*columns, literal_column("()")))
+        ).all()
+
+        facets = {name: [] for name in FACETS}
+        total = 0
+        for row in rows:
+            values, grouping, count = row[:len(FACETS)], row[-2], row[-1]
+            # GROUPING() sets a bit for each column the row is NOT grouped by,
+            # the first column being the most significant
+            grouped = [
+                name for position, name in enumerate(FACETS)
+                if not grouping & (1 << (len(FACETS) - 1 - position))
+            ]
+            if not grouped:
+                total = count
+            else:
+                name = grouped[0]
+                facets[name].append({"value": values[FACETS.index(name)], "count": count})
+
+        for counts in facets.values():
+            counts.sort(key=lambda facet: (-facet["count"], facet["value"] or ""))
+        return {"total": total, **facets}
 
@@ -1,11 +1,14 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Integer, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Boolean, Integer, BigInteger, Float, JSON, Computed, Index, UniqueConstraint, DDL, event, text
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 # Ensure this import points to your base declarative class
 from .database import Base 
 
+# Trigram indexes (channel discovery) need pg_trgm before the tables are created
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
 
 class User(Base):
     __tablename__ = "users"
@@ -63,11 +66,24 @@ class Channel(Base):
     
     # Channel specific columns
     last_message_at = Column(DateTime)
+    # Legacy and shared by everyone; per-user badges live on ChannelMember.unread_count
     unread_count = Column(Integer, default=0)
     is_public = Column(Boolean, default=True)
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     member_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Tombstone: set when deletion is requested, rows are reclaimed in the background
+    deleted_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Serves ILIKE '%term%' lookups in channel discovery
+        Index(
+            "ix_channels_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
     
     # Relationships
     workspace = relationship("Workspace", back_populates="channels")
@@ -102,6 +118,23 @@ class Message(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     edited_at = Column(DateTime)
 
+    # Full-text search document (content + attachment name), maintained by Postgres
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('english', coalesce(content, '') || ' ' || coalesce(file_name, ''))",
+            persisted=True,
+        ),
+    )
+
+    __table_args__ = (
+        Index("ix_messages_search_vector", "search_vector", postgresql_using="gin"),
+        # Download name lookup and orphaned-blob checks during channel cleanup
+        Index("ix_messages_file_url", "file_url"),
+        # Scrollback and the per-channel "latest message" lookup
+        Index("ix_messages_channel_id_created_at", "channel_id", "created_at"),
+    )
+
     # Relationships
     # user = message author (fixed Ambiguity by being explicit)
     user = relationship(
@@ -123,6 +156,11 @@ class Reaction(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     emoji = Column(String(10), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # One of each emoji per user per message; also serves per-message counts
+        UniqueConstraint("message_id", "user_id", "emoji", name="uq_reactions_message_id_user_id_emoji"),
+    )
     
     message = relationship("Message", back_populates="reactions")
 
@@ -133,6 +171,8 @@ class Idea(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     message_id = Column(UUID(as_uuid=True), ForeignKey("messages.id"))
     channel_id = Column(UUID(as_uuid=True), ForeignKey("channels.id"))
+    # Copy of the channel's workspace, so the Ideas Hub needs no join
+    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id"))
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     
     title = Column(String(255), nullable=False)
@@ -151,6 +191,25 @@ class Idea(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Full-text search document (title weighted above description)
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    )
+
+    __table_args__ = (
+        Index("ix_ideas_search_vector", "search_vector", postgresql_using="gin"),
+        # Ideas Hub pages, newest first, unfiltered and by status
+        Index("ix_ideas_workspace_id_created_at", "workspace_id", "created_at", "id"),
+        Index("ix_ideas_workspace_id_status_created_at", "workspace_id", "status", "created_at", "id"),
+        # Per-channel lookups, including channel cleanup
+        Index("ix_ideas_channel_id_status_created_at", "channel_id", "status", "created_at"),
+    )
     
     message = relationship("Message", back_populates="ideas")
     channel = relationship("Channel", back_populates="ideas")
@@ -193,7 +252,98 @@ class ChannelMember(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     role = Column(String, default="member")
     joined_at = Column(DateTime, default=datetime.utcnow)
+    # "Clear chat" watermark: messages at or before this are hidden for this member
+    cleared_before = Column(DateTime, nullable=True)
+    # Per-member read state; unread_count is maintained incrementally on insert
+    last_read_message_at = Column(DateTime, nullable=True)
+    # Delivery receipt high-water mark: everything created up to here reached a device
+    last_delivered_at = Column(DateTime, nullable=True)
+    unread_count = Column(Integer, default=0, server_default="0", nullable=False)
+
+    __table_args__ = (
+        Index("ix_channel_members_user_id_channel_id", "user_id", "channel_id"),
+        # Per-channel fan-out updates (unread counters)
+        Index("ix_channel_members_channel_id", "channel_id"),
+    )
     
     # Relationships
     channel = relationship("Channel", back_populates="members")
-    user = relationship("User", back_populates="channel_memberships")
\ No newline at end of file
+    user = relationship("User", back_populates="channel_memberships")
+
+
+class ChannelDeletion(Base):
+    """Progress of a background channel deletion; outlives the channel row."""
+    __tablename__ = "channel_deletions"
+
+    channel_id = Column(UUID(as_uuid=True), primary_key=True)
+    workspace_id = Column(UUID(as_uuid=True), ForeignKey("workspaces.id"))
+    requested_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    status = Column(String(20), default="pending", nullable=False)  # pending | running | completed | failed
+    phase = Column(String(30), default="memberships", nullable=False)
+    rows_deleted = Column(Integer, default=0, nullable=False)
+    files_deleted = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    # Failed batches in a row; the job is retried with backoff, then marked failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Uploads of deleted messages not unlinked yet, so a crash cannot leak them
+    pending_files = Column(JSON)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime)
+
+
+class ChangeLog(Base):
+    """
+    Append-only feed of channel changes for reconnecting clients (/sync).
+    Rows are read in (txid, id) order and only once their transaction can no
+    longer be overtaken by an older in-flight one; see SyncService.
+    """
+    __tablename__ = "change_log"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    txid = Column(
+        BigInteger,
+        server_default=text("pg_current_xact_id()::text::bigint"),
+        nullable=False,
+    )
+    # No foreign keys: entries must outlive the channels and messages they describe
+    channel_id = Column(UUID(as_uuid=True), nullable=False)
+    kind = Column(String(40), nullable=False)
+    entity_id = Column(UUID(as_uuid=True))
+    user_id = Column(UUID(as_uuid=True))  # actor
+    payload = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_txid_id", "txid", "id"),
+        Index("ix_change_log_channel_id_txid", "channel_id", "txid"),
+    )
+
+
+class RateLimitBucket(Base):
+    """
+    Shared token buckets for RATE_LIMIT_BACKEND=postgres (see rate_limit.py).
+    UNLOGGED: losing them in a crash only resets the limits.
+    """
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(200), primary_key=True)  # "<rule>:<user id or address>"
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    allowed = Column(Boolean, nullable=False)
+
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+
+class CacheVersion(Base):
+    """
+    Counters behind http_cache.versions, shared by every worker. A write
+    bumps the counters of the views it changes in its own transaction.
+    """
+    __tablename__ = "cache_versions"
+
+    namespace = Column(String(20), primary_key=True)  # http_cache.CHANNELS, IDEAS, ...
+    entity_id = Column(UUID(as_uuid=True), primary_key=True)  # workspace or channel id
+    version = Column(BigInteger, nullable=False)
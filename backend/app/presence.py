@@ -0,0 +1,168 @@
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+import asyncio
+import json
+import time
+import uuid
+
+from .database import SessionLocal
+from .models import User
+
+
+class PresenceTracker:
+    """
+    Typing and online/offline signals.
+
+    Nothing is sent per keystroke: events are collected per channel and
+    flushed as one ephemeral "presence" frame every `flush_interval`, with
+    a user's repeated typing notices in a channel dropped for
+    `typing_min_interval`. Inbound activity only stamps an in-memory
+    last_seen; those are written to users.last_seen in one bulk UPDATE
+    every `last_seen_flush_interval`.
+    """
+
+    def __init__(
+        self,
+        manager,
+        flush_interval: float = 0.5,
+        typing_min_interval: float = 2.0,
+        typing_ttl: float = 6.0,
+        last_seen_flush_interval: float = 30.0,
+    ):
+        self.manager = manager
+        self.flush_interval = flush_interval
+        self.typing_min_interval = typing_min_interval
+        self.typing_ttl = typing_ttl
+        self.last_seen_flush_interval = last_seen_flush_interval
+
+        # channel -> user -> latest event ("typing", "stopped", "online", "offline");
+        # a newer event for the same user replaces the older one
+        self.pending: Dict[uuid.UUID, Dict[uuid.UUID, str]] = {}
+        self.last_typing: Dict[Tuple[uuid.UUID, uuid.UUID], float] = {}
+        self.last_seen: Dict[uuid.UUID, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"typing_accepted": 0, "typing_dropped": 0, "frames_sent": 0, "last_seen_writes": 0}
+
+    # ---------- events ----------
+
+    def typing(self, channel_id: uuid.UUID, user_id: uuid.UUID, is_typing: bool = True) -> bool:
+        """Queue a typing start/stop; returns False when rate limited"""
+        key = (channel_id, user_id)
+        now = time.monotonic()
+        if is_typing:
+            last = self.last_typing.get(key)
+            if last is not None and now - last < self.typing_min_interval:
+                self.counters["typing_dropped"] += 1
+                return False
+            self.last_typing[key] = now
+        elif self.last_typing.pop(key, None) is None:
+            return False  # never announced, nothing to stop
+        self.counters["typing_accepted"] += 1
+        self.pending.setdefault(channel_id, {})[user_id] = "typing" if is_typing else "stopped"
+        return True
+
+    def seen(self, user_id: uuid.UUID):
+        self.last_seen[user_id] = datetime.utcnow()
+
+    def user_connected(self, user_id: uuid.UUID, channel_ids: Iterable[uuid.UUID]):
+        self.seen(user_id)
+        for channel_id in channel_ids:
+            self.pending.setdefault(channel_id, {})[user_id] = "online"
+
+    def user_disconnected(self, user_id: uuid.UUID, channel_ids: Iterable[uuid.UUID]):
+        """Call once the user's last socket is gone"""
+        self.seen(user_id)
+        for channel_id in channel_ids:
+            self.last_typing.pop((channel_id, user_id), None)
+            self.pending.setdefault(channel_id, {})[user_id] = "offline"
+
+    async def send_snapshot(self, websocket, channel_ids: Iterable[uuid.UUID]):
+        """Tell a freshly connected socket who is online in its channels"""
+        for channel_id in channel_ids:
+            online = {conn.user_id for conn in self.manager.active_connections.get(channel_id, ())}
+            await self.manager.send_personal_message(json.dumps({
+                "type": "presence",
+                "channel_id": str(channel_id),
+                "online": [str(user_id) for user_id in online],
+                "snapshot": True,
+            }), websocket)
+
+    # ---------- flushing ----------
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_last_seen()
+
+    async def _run(self):
+        next_db_flush = time.monotonic() + self.last_seen_flush_interval
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_events()
+                if time.monotonic() >= next_db_flush:
+                    next_db_flush = time.monotonic() + self.last_seen_flush_interval
+                    await self.flush_last_seen()
+            except Exception as e:
+                print(f"[PRESENCE_ERROR] {e}")
+
+    async def flush_events(self):
+        """One frame per channel with everything that changed since the last flush"""
+        pending, self.pending = self.pending, {}
+        for channel_id, events in pending.items():
+            frame = {"type": "presence", "channel_id": str(channel_id), "typing_ttl_ms": int(self.typing_ttl * 1000)}
+            for user_id, event in events.items():
+                key = {"typing": "typing", "stopped": "stopped_typing"}.get(event, event)
+                frame.setdefault(key, []).append(str(user_id))
+            await self.manager.broadcast_ephemeral(json.dumps(frame), channel_id)
+            self.counters["frames_sent"] += 1
+
+        # Drop rate-limit entries nobody refreshed; clients expire typing on their own
+        cutoff = time.monotonic() - self.typing_ttl
+        for key in [key for key, at in self.last_typing.items() if at < cutoff]:
+            del self.last_typing[key]
+
+    async def flush_last_seen(self):
+        """Write buffered last_seen stamps in a single executemany UPDATE"""
+        if not self.last_seen:
+            return
+        stamps, self.last_seen = self.last_seen, {}
+        if not await run_in_threadpool(self._write_last_seen, stamps):
+            # Keep them for the next round unless newer stamps arrived
+            for user_id, at in stamps.items():
+                self.last_seen.setdefault(user_id, at)
+
+    def _write_last_seen(self, stamps: Dict[uuid.UUID, datetime]) -> bool:
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(User),
+                [{"id": user_id, "last_seen": at} for user_id, at in stamps.items()],
+            )
+            db.commit()
+            self.counters["last_seen_writes"] += 1
+            return True
+        except Exception as e:
+            db.rollback()
+            print(f"[PRESENCE_ERROR] last_seen flush failed: {e}")
+            return False
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "pending_channels": len(self.pending),
+            "pending_last_seen": len(self.last_seen),
+            **self.counters,
+        }
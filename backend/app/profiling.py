@@ -0,0 +1,159 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextvars import ContextVar
+from collections import Counter
+from typing import List, Optional, Tuple
+import heapq
+import json
+import re
+import time
+
+# Profile of the request being served. Sync routes and their dependencies run
+# in the threadpool with a copy of this context, so they see the same object.
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("sql_profile", default=None)
+
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\bIN \((?:\s*\?\s*,)+\s*\?\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse literals, bind markers, IN lists and whitespace so repeats group together"""
+    sql = _STRING.sub("?", statement)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class RequestProfile:
+    __slots__ = ("query_count", "db_time", "slowest", "statements", "top_n")
+
+    def __init__(self, top_n: int = 5):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.top_n = top_n
+        # Min-heap of (seconds, sql) holding the N slowest statements
+        self.slowest: List[Tuple[float, str]] = []
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        sql = normalize_sql(statement)
+        self.query_count += 1
+        self.db_time += seconds
+        self.statements[sql] += 1
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, (seconds, sql))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, sql))
+
+    def most_repeated(self) -> Optional[Tuple[str, int]]:
+        """The statement run most often, a likely N+1 when the count is high"""
+        if not self.statements:
+            return None
+        return self.statements.most_common(1)[0]
+
+    def summary(self, sql_chars: int = 300) -> dict:
+        repeated = self.most_repeated()
+        return {
+            "queries": self.query_count,
+            "db_ms": round(self.db_time * 1000, 2),
+            "slowest": [
+                {"ms": round(seconds * 1000, 2), "sql": sql[:sql_chars]}
+                for seconds, sql in sorted(self.slowest, reverse=True)
+            ],
+            "most_repeated": {"count": repeated[1], "sql": repeated[0][:sql_chars]} if repeated else None,
+        }
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+def install_sql_profiler(engine: Engine):
+    """Time every statement on `engine` into the current request's profile"""
+    if getattr(engine, "_sql_profiler_installed", False):
+        return
+    engine._sql_profiler_installed = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            conn.info.setdefault("sql_profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        if profile is None:
+            return
+        started = conn.info.get("sql_profile_started")
+        if started:
+            profile.record(statement, time.perf_counter() - started.pop())
+
+
+class SQLProfilerMiddleware:
+    """
+    Pure ASGI middleware giving each HTTP request a RequestProfile. Requests
+    over the time or query-count thresholds are logged with their slowest
+    and most repeated statements; with `expose_header` the summary is also
+    returned in X-SQL-Profile plus a Server-Timing entry for devtools.
+    """
+
+    def __init__(
+        self,
+        app,
+        top_n: int = 5,
+        slow_request_ms: float = 500.0,
+        max_queries: int = 30,
+        expose_header: bool = False,
+    ):
+        self.app = app
+        self.top_n = top_n
+        self.slow_request_ms = slow_request_ms
+        self.max_queries = max_queries
+        self.expose_header = expose_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(self.top_n)
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_with_profile(message):
+            # Headers go out once the handler has returned, so counts are final
+            if self.expose_header and message["type"] == "http.response.start":
+                summary = profile.summary(sql_chars=120)
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-profile", json.dumps(summary).encode("latin-1", "replace")))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"'.encode(),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _current_profile.reset(token)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= self.slow_request_ms or profile.query_count >= self.max_queries:
+                self._log(scope, elapsed_ms, profile)
+
+    @staticmethod
+    def _log(scope, elapsed_ms: float, profile: RequestProfile):
+        summary = profile.summary()
+        print(
+            f"[SLOW_REQUEST] {scope.get('method')} {scope.get('path')} {elapsed_ms:.1f}ms "
+            f"queries={summary['queries']} db={summary['db_ms']}ms"
+        )
+        repeated = summary["most_repeated"]
+        if repeated and repeated["count"] > 1:
+            print(f"[SLOW_REQUEST]   repeated {repeated['count']}x: {repeated['sql']}")
+        for entry in summary["slowest"]:
+            print(f"[SLOW_REQUEST]   {entry['ms']}ms: {entry['sql']}")
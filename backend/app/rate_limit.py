@@ -0,0 +1,217 @@
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import text
+from contextlib import contextmanager
+from typing import Dict, NamedTuple, Tuple
+import math
+import threading
+import time
+import uuid
+
+from .auth import get_current_user_id
+from .config import settings
+from .database import engine
+
+
+class Rule(NamedTuple):
+    """
+    `per_minute` tokens refill continuously up to `burst`. A request costing
+    more than `burst` is let through on a full bucket and leaves it in debt,
+    so it is paid for at the same rate as the single requests it replaces.
+    """
+    per_minute: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+class MemoryBackend:
+    """
+    Token buckets in this process. Cheap enough for every WebSocket frame,
+    but each worker counts separately, so the effective limit is per worker.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (tokens, monotonic time of last update)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rule: Rule, cost: float = 1.0) -> Tuple[bool, float]:
+        """(allowed, seconds until `cost` tokens are available)"""
+        needed = min(cost, float(rule.burst))
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(rule.burst), now))
+            tokens = min(float(rule.burst), tokens + (now - updated) * rule.rate)
+            allowed = tokens >= needed
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, 0.0 if allowed else (needed - tokens) / rule.rate
+
+    def _prune(self, now: float):
+        # Buckets idle long enough to be full again carry no state
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated > 3600:
+                del self._buckets[key]
+        while len(self._buckets) > self.max_keys:
+            self._buckets.pop(next(iter(self._buckets)))
+
+
+class PostgresBackend:
+    """
+    Token buckets shared by every worker, in the UNLOGGED rate_limit_buckets
+    table. Refill and spend happen in one upsert, so concurrent workers
+    cannot both spend the last token. Costs one round trip per check on its
+    own short transaction, outside the request's session.
+    """
+
+    # Tokens after refilling since the last update, capped at the burst size
+    _REFILLED = "LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate)"
+    # :needed is the cost capped at the burst size (see Rule)
+    _TAKE = text(f"""
+        INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at, allowed)
+        VALUES (:key, :burst - :cost, clock_timestamp(), :burst >= :needed)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = {_REFILLED} - CASE WHEN {_REFILLED} >= :needed THEN :cost ELSE 0 END,
+            updated_at = clock_timestamp(),
+            allowed = {_REFILLED} >= :needed
+        RETURNING tokens, allowed
+    """)
+
+    def take(self, key: str, rule: Rule, cost: float = 1.0) -> Tuple[bool, float]:
+        needed = min(cost, float(rule.burst))
+        with engine.begin() as conn:
+            tokens, allowed = conn.execute(self._TAKE, {
+                "key": key, "burst": float(rule.burst), "rate": rule.rate, "cost": cost, "needed": needed,
+            }).one()
+        if allowed:
+            return True, 0.0
+        return False, (needed - float(tokens)) / rule.rate
+
+
+class RateLimiter:
+    """Named rules over a bucket backend; each (rule, caller) pair has its own bucket"""
+
+    def __init__(self, backend, rules: Dict[str, Rule], enabled: bool = True):
+        self.backend = backend
+        self.rules = rules
+        self.enabled = enabled
+        self.counters = {"allowed": 0, "limited": 0, "errors": 0}
+
+    def check(self, rule_name: str, subject: str, cost: float = 1.0) -> Tuple[bool, float]:
+        rule = self.rules[rule_name]
+        if not self.enabled:
+            return True, 0.0
+        try:
+            allowed, retry_after = self.backend.take(f"{rule_name}:{subject}", rule, cost)
+        except Exception as e:
+            # A broken limiter must not take the API down with it
+            self.counters["errors"] += 1
+            print(f"[RATE_LIMIT_ERROR] {e}")
+            return True, 0.0
+        self.counters["allowed" if allowed else "limited"] += 1
+        return allowed, retry_after
+
+    def enforce(self, rule_name: str, subject: str, cost: float = 1.0):
+        allowed, retry_after = self.check(rule_name, subject, cost)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, slow down",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
+class ConcurrencyGate:
+    """
+    Caps how many requests run an expensive section at once. Callers past
+    the cap get 429 with Retry-After immediately instead of queuing for a
+    threadpool slot or DB connection until they time out.
+    """
+
+    def __init__(self, name: str, limit: int, retry_after: int = 1):
+        self.name = name
+        self.limit = limit
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(limit)
+        self.counters = {"admitted": 0, "rejected": 0}
+
+    @contextmanager
+    def admit(self):
+        if not self._slots.acquire(blocking=False):
+            self.counters["rejected"] += 1
+            raise HTTPException(
+                status_code=429,
+                detail=f"Server busy ({self.name}), retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.counters["admitted"] += 1
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+RULES = {
+    "messages": Rule(settings.RATE_LIMIT_MESSAGES_PER_MINUTE, settings.RATE_LIMIT_MESSAGES_BURST),
+    "uploads": Rule(settings.RATE_LIMIT_UPLOADS_PER_MINUTE, settings.RATE_LIMIT_UPLOADS_BURST),
+    "ideas": Rule(settings.RATE_LIMIT_IDEAS_PER_MINUTE, settings.RATE_LIMIT_IDEAS_BURST),
+    "login": Rule(settings.RATE_LIMIT_LOGIN_PER_MINUTE, settings.RATE_LIMIT_LOGIN_BURST),
+    "ws_frames": Rule(settings.RATE_LIMIT_WS_FRAMES_PER_MINUTE, settings.RATE_LIMIT_WS_FRAMES_BURST),
+    # Counted in messages, charged by the batch route itself
+    "batch_messages": Rule(settings.RATE_LIMIT_BATCH_MESSAGES_PER_MINUTE, settings.RATE_LIMIT_BATCH_MESSAGES_BURST),
+}
+
+limiter = RateLimiter(
+    PostgresBackend() if settings.RATE_LIMIT_BACKEND == "postgres" else MemoryBackend(),
+    RULES,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+
+# WebSocket frames are checked per frame on the event loop, so never a DB round trip
+ws_limiter = RateLimiter(MemoryBackend(), RULES, enabled=settings.RATE_LIMIT_ENABLED)
+
+hashing_gate = ConcurrencyGate("password hashing", settings.MAX_CONCURRENT_PASSWORD_HASHES)
+extraction_gate = ConcurrencyGate("file extraction", settings.MAX_CONCURRENT_FILE_EXTRACTIONS)
+
+
+def rate_limit(rule_name: str):
+    """Route dependency: one bucket per user per rule"""
+    def dependency(current_user_id: uuid.UUID = Depends(get_current_user_id)):
+        limiter.enforce(rule_name, str(current_user_id))
+    return dependency
+
+
+def client_address(request: Request) -> str:
+    """
+    The caller's address. Behind a reverse proxy every request comes from the
+    proxy, so the address it forwards in RATE_LIMIT_CLIENT_IP_HEADER is used;
+    only the last entry is, the earlier ones being whatever the client sent.
+    """
+    header = settings.RATE_LIMIT_CLIENT_IP_HEADER
+    if header:
+        forwarded = request.headers.get(header, "").split(",")[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit_by_ip(rule_name: str):
+    """Route dependency for unauthenticated routes: one bucket per client address"""
+    def dependency(request: Request):
+        limiter.enforce(rule_name, client_address(request))
+    return dependency
+
+
+def stats() -> dict:
+    return {
+        "backend": type(limiter.backend).__name__,
+        "http": limiter.counters,
+        "ws": ws_limiter.counters,
+        "gates": {gate.name: {"limit": gate.limit, **gate.counters} for gate in (hashing_gate, extraction_gate)},
+    }
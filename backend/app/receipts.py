@@ -0,0 +1,247 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func, bindparam, case, or_, DateTime
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+import asyncio
+import json
+import uuid
+
+from .database import SessionLocal
+from .models import Channel, ChannelMember, HiddenMessage, Message
+from .http_cache import versions, CHANNELS
+
+DELIVERED = "delivered"
+READ = "read"
+
+
+class ReceiptService:
+    """
+    Delivery/read state is one pair of timestamps per member (high-water
+    marks), not one row per message per recipient. A message is delivered
+    or read for everyone once the channel-wide minimum mark passes its
+    created_at, so the sender's status is one aggregate per channel.
+    """
+
+    @staticmethod
+    def watermarks(db: Session, channel_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, Tuple[datetime, datetime]]:
+        """channel_id -> (delivered_through, read_through) over all members"""
+        channel_ids = list(channel_ids)
+        if not channel_ids:
+            return {}
+        # Members who never acknowledged anything count from when they joined
+        read_mark = func.coalesce(ChannelMember.last_read_message_at, ChannelMember.joined_at)
+        delivered_mark = func.coalesce(
+            func.greatest(ChannelMember.last_delivered_at, ChannelMember.last_read_message_at),
+            ChannelMember.joined_at,
+        )
+        rows = db.execute(
+            select(ChannelMember.channel_id, func.min(delivered_mark), func.min(read_mark))
+            .where(ChannelMember.channel_id.in_(channel_ids))
+            .group_by(ChannelMember.channel_id)
+        ).all()
+        return {channel_id: (delivered, read) for channel_id, delivered, read in rows}
+
+    @staticmethod
+    def status_for(created_at: datetime, marks: Optional[Tuple[datetime, datetime]]) -> str:
+        if not marks:
+            return "sent"
+        delivered_through, read_through = marks
+        if read_through and created_at <= read_through:
+            return READ
+        if delivered_through and created_at <= delivered_through:
+            return DELIVERED
+        return "sent"
+
+    @staticmethod
+    def parse_timestamp(value) -> Optional[datetime]:
+        """Client-supplied message timestamp, clamped to now; None if unusable"""
+        try:
+            at = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if at.tzinfo is not None:
+            # Message timestamps are naive server-local time
+            at = at.astimezone().replace(tzinfo=None)
+        return min(at, datetime.now())
+
+
+class ReceiptTracker:
+    """
+    Buffers receipt acks from sockets and writes them every `flush_interval`
+    as one executemany UPDATE, keeping only the newest mark per member and
+    kind. After each write the affected channels get one ephemeral
+    "receipts" frame with their new watermarks, whatever the member count.
+    """
+
+    def __init__(self, manager, flush_interval: float = 1.0):
+        self.manager = manager
+        self.flush_interval = flush_interval
+        # (channel, user) -> [delivered_at, read_at]
+        self.pending: Dict[Tuple[uuid.UUID, uuid.UUID], list] = {}
+        self.last_sent: Dict[uuid.UUID, Tuple[datetime, datetime]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {"acks": 0, "rows_written": 0, "flushes": 0, "frames_sent": 0}
+
+    def ack(self, channel_id: uuid.UUID, user_id: uuid.UUID, kind: str, at: datetime) -> bool:
+        if kind not in (DELIVERED, READ):
+            return False
+        marks = self.pending.setdefault((channel_id, user_id), [None, None])
+        index = 0 if kind == DELIVERED else 1
+        if marks[index] is None or at > marks[index]:
+            marks[index] = at
+        self.counters["acks"] += 1
+        return True
+
+    def ack_threadsafe(self, channel_id: uuid.UUID, user_id: uuid.UUID, kind: str, at: datetime):
+        """ack() from sync routes running in the threadpool"""
+        loop = self.manager.loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.ack, channel_id, user_id, kind, at)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[RECEIPTS_ERROR] {e}")
+
+    async def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        try:
+            marks = await run_in_threadpool(self._write, pending)
+        except Exception as e:
+            print(f"[RECEIPTS_ERROR] flush failed: {e}")
+            marks = None
+        if marks is None:
+            # Retry with the next flush; newer acks win
+            for (channel_id, user_id), (delivered_at, read_at) in pending.items():
+                if delivered_at:
+                    self.ack(channel_id, user_id, DELIVERED, delivered_at)
+                if read_at:
+                    self.ack(channel_id, user_id, READ, read_at)
+            return
+        self.counters["flushes"] += 1
+
+        for channel_id, channel_marks in marks.items():
+            if self.last_sent.get(channel_id) == channel_marks:
+                continue
+            self.last_sent[channel_id] = channel_marks
+            delivered_through, read_through = channel_marks
+            await self.manager.broadcast_ephemeral(json.dumps({
+                "type": "receipts",
+                "channel_id": str(channel_id),
+                "delivered_through": delivered_through.isoformat() if delivered_through else None,
+                "read_through": read_through.isoformat() if read_through else None,
+            }), channel_id)
+            self.counters["frames_sent"] += 1
+
+    @staticmethod
+    def _statement():
+        """One UPDATE per (channel, user), run as an executemany"""
+        # GREATEST skips NULLs, so absent marks leave the column alone and
+        # marks never move backwards; a read also counts as delivered.
+        read_at = bindparam("b_read_at", type_=DateTime)
+        read_mark = func.greatest(ChannelMember.last_read_message_at, read_at)
+        # A read mark at or past the channel's newest message clears the
+        # badge; an older one leaves only what is still unread after it
+        channel_last_message_at = (
+            select(Channel.last_message_at)
+            .where(Channel.id == ChannelMember.channel_id)
+            .correlate(ChannelMember)
+            .scalar_subquery()
+        )
+        hidden = (
+            select(HiddenMessage.message_id)
+            .where(
+                HiddenMessage.message_id == Message.id,
+                HiddenMessage.user_id == ChannelMember.user_id,
+            )
+            .correlate(Message, ChannelMember)
+        )
+        still_unread = (
+            select(func.count(Message.id))
+            .where(
+                Message.channel_id == ChannelMember.channel_id,
+                Message.user_id != ChannelMember.user_id,
+                Message.created_at > read_mark,
+                or_(ChannelMember.cleared_before.is_(None), Message.created_at > ChannelMember.cleared_before),
+                ~hidden.exists(),
+            )
+            .correlate(ChannelMember)
+            .scalar_subquery()
+        )
+        return (
+            update(ChannelMember)
+            .where(
+                ChannelMember.channel_id == bindparam("b_channel_id"),
+                ChannelMember.user_id == bindparam("b_user_id"),
+            )
+            .values(
+                last_delivered_at=func.greatest(
+                    ChannelMember.last_delivered_at,
+                    bindparam("b_delivered_at", type_=DateTime),
+                    read_at,
+                ),
+                last_read_message_at=read_mark,
+                unread_count=case(
+                    (read_at.is_(None), ChannelMember.unread_count),
+                    (read_mark >= func.coalesce(channel_last_message_at, read_mark), 0),
+                    else_=still_unread,
+                ),
+            )
+        )
+
+    def _write(self, pending: Dict[Tuple[uuid.UUID, uuid.UUID], list]):
+        """Channel watermarks after the write, or None if it failed"""
+        params = [
+            {
+                "b_channel_id": channel_id,
+                "b_user_id": user_id,
+                "b_delivered_at": delivered_at,
+                "b_read_at": read_at,
+            }
+            for (channel_id, user_id), (delivered_at, read_at) in pending.items()
+        ]
+
+        db = SessionLocal()
+        try:
+            db.connection().execute(self._statement(), params)
+            marks = ReceiptService.watermarks(db, {channel_id for channel_id, _ in pending})
+            # Read marks changed unread badges in these workspaces' channel lists
+            read_channels = {channel_id for (channel_id, _), (_, read_at) in pending.items() if read_at}
+            if read_channels:
+                read_workspaces = db.execute(
+                    select(Channel.workspace_id).where(Channel.id.in_(read_channels)).distinct()
+                ).scalars().all()
+                versions.bump(db, *((CHANNELS, workspace_id) for workspace_id in read_workspaces))
+            db.commit()
+            self.counters["rows_written"] += len(params)
+            return marks
+        except Exception as e:
+            db.rollback()
+            print(f"[RECEIPTS_ERROR] flush failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {"pending": len(self.pending), **self.counters}
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response, Query
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import desc, and_, or_, exists, select, insert, func, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import uuid
 import shutil
@@ -16,10 +18,11 @@ from .models import (
     Workspace,
     Channel,
     Message,
+    Reaction,
     Idea,
-    CalendarEvent,
     HiddenMessage,
-    ChannelMember
+    ChannelMember,
+    ChannelDeletion,
 )
 from .schemas import (
     UserCreate,
@@ -31,23 +34,42 @@ from .schemas import (
     ChannelCreate,
     ChannelResponse,
     MessageCreate,
+    MessageBatchCreate,
     MessageResponse,
+    ReactionCreate,
+    ReactionResponse,
     IdeaResponse,
+    IdeaPage,
+    IdeaFacetsResponse,
     IdeaUpdate,
     CalendarEventResponse,
     ChannelMemberResponse,
+    ChannelDeletionResponse,
+    SearchResponse,
+    SyncResponse,
 )
 from .auth import (
     get_password_hash,
     verify_password,
     create_access_token,
     get_current_user,
+    get_current_user_id,
 )
 from .ideas_service import IdeasService
 from .calendar_service import CalendarService
+from .search_service import SearchService
+from .sync_service import SyncService
+from . import sync_service as sync
+from .channel_cleanup import ChannelCleanupService, cleanup_worker
+from .websocket import manager, receipts
+from .receipts import ReceiptService, READ as RECEIPT_READ
 from .ai_assistant import AIAssistant
 from .file_text_extractor import extract_text_from_file
 from .upload import UPLOAD_DIR
+from .cache import TTLCache
+from .rate_limit import limiter, rate_limit, rate_limit_by_ip, hashing_gate, extraction_gate
+from .http_cache import ResponseCache, versions, WORKSPACE, CHANNELS, IDEAS, CALENDAR, MEMBERS
+from .config import settings
 
 # --- Router Initialization ---
 router = APIRouter()
@@ -64,15 +86,122 @@ class ForwardRequest(BaseModel):
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Characters of the newest message shown in the chat list
+LAST_MESSAGE_PREVIEW_LENGTH = 120
+
+# ============ CACHES ============
+
+# Public channel discovery results keyed by normalized search term
+discover_cache = TTLCache(
+    max_entries=settings.DISCOVER_CACHE_MAX_ENTRIES,
+    ttl=settings.DISCOVER_CACHE_TTL_SECONDS,
+)
+
+# Serialized bodies and ETags of polled GETs; writes below bump `versions`
+response_cache = ResponseCache(
+    versions,
+    max_entries=settings.HTTP_CACHE_MAX_ENTRIES,
+    ttl=settings.HTTP_CACHE_TTL_SECONDS,
+)
+
+
+def _record_new_messages(db: Session, channel_id: uuid.UUID, author_id: uuid.UUID, count: int, at: datetime):
+    """
+    Bump unread badges for everyone but the author and mark the channel read
+    for the author. Two UPDATEs per send instead of a COUNT per channel per
+    channel-list request.
+    """
+    db.query(ChannelMember).filter(
+        ChannelMember.channel_id == channel_id,
+        ChannelMember.user_id != author_id,
+    ).update(
+        {ChannelMember.unread_count: ChannelMember.unread_count + count},
+        synchronize_session=False
+    )
+    db.query(ChannelMember).filter(
+        ChannelMember.channel_id == channel_id,
+        ChannelMember.user_id == author_id,
+    ).update(
+        {
+            ChannelMember.last_read_message_at: at,
+            ChannelMember.last_delivered_at: at,
+            ChannelMember.unread_count: 0,
+        },
+        synchronize_session=False
+    )
+
+
+def _bump_workspace_views(db: Session, channel_id: uuid.UUID, *namespaces: str):
+    """
+    Invalidate cached views of the channel's workspace. Call just before
+    the commit: the new versions become visible together with the rows.
+    """
+    workspace_id = db.query(Channel.workspace_id).filter(Channel.id == channel_id).scalar()
+    if workspace_id:
+        versions.bump(db, *((namespace, workspace_id) for namespace in namespaces))
+
+
+def _get_live_channel(db: Session, channel_id: uuid.UUID) -> Channel:
+    """The channel, or 404 once it has been deleted (its rows may still exist until cleanup)"""
+    channel = db.query(Channel).filter(
+        Channel.id == channel_id,
+        Channel.deleted_at.is_(None),
+    ).first()
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return channel
+
+
+def _get_live_message(db: Session, message_id: uuid.UUID) -> Message:
+    """The message, or 404 if it or its channel is gone"""
+    message = db.query(Message).join(Channel, Channel.id == Message.channel_id).filter(
+        Message.id == message_id,
+        Channel.deleted_at.is_(None),
+    ).first()
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return message
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _reaction_counts(db: Session, message_ids: List[uuid.UUID], user_id: uuid.UUID):
+    """message_id -> [{"emoji", "count", "reacted"}] for a whole page in one grouped query"""
+    counts = {}
+    if not message_ids:
+        return counts
+    rows = db.execute(
+        select(
+            Reaction.message_id,
+            Reaction.emoji,
+            func.count(),
+            func.bool_or(Reaction.user_id == user_id),
+        )
+        .where(Reaction.message_id.in_(message_ids))
+        .group_by(Reaction.message_id, Reaction.emoji)
+        # Emoji in the order they were first used on the message
+        .order_by(Reaction.message_id, func.min(Reaction.created_at))
+    ).all()
+    for message_id, emoji, count, reacted in rows:
+        counts.setdefault(message_id, []).append(
+            {"emoji": emoji, "count": count, "reacted": bool(reacted)}
+        )
+    return counts
+
+
 # ============ AUTH ROUTES ============
 
-@router.post("/auth/register", response_model=UserResponse)
+@router.post("/auth/register", response_model=UserResponse, dependencies=[Depends(rate_limit_by_ip("login"))])
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
     existing_user = db.query(User).filter(User.email == user_data.email).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user_data.password)
+    with hashing_gate.admit():
+        hashed_password = get_password_hash(user_data.password)
     user = User(
         email=user_data.email,
         password_hash=hashed_password,
@@ -84,7 +213,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     return user
 
 
-@router.post("/auth/login", response_model=Token)
+@router.post("/auth/login", response_model=Token, dependencies=[Depends(rate_limit_by_ip("login"))])
 def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     # 1. Query for the user by email
     user = db.query(User).filter(User.email == credentials.email).first()
@@ -101,7 +230,9 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
     # 3. Verify the password
     # NOTE: The crash is often inside verify_password if its dependencies (e.g., bcrypt) 
     # are missing or misconfigured.
-    if not verify_password(credentials.password, user.password_hash):
+    with hashing_gate.admit():
+        password_ok = verify_password(credentials.password, user.password_hash)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -141,13 +272,19 @@ def create_workspace(
 @router.get("/workspaces/{workspace_id}", response_model=WorkspaceResponse)
 def get_workspace(
     workspace_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user_id: uuid.UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    return workspace
+    def build():
+        workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+        if not workspace:
+            raise HTTPException(status_code=404, detail="Workspace not found")
+        return workspace
+
+    return response_cache.respond(
+        request, db, current_user_id, ((WORKSPACE, workspace_id),), WorkspaceResponse, build,
+    )
 
 
 # ============ CHANNEL ROUTES ============
@@ -183,7 +320,11 @@ def create_channel(
         role="admin"
     )
     db.add(member)
+    versions.bump(db, (CHANNELS, workspace_id), (MEMBERS, channel.id))
     db.commit()
+
+    if channel.is_public:
+        discover_cache.clear()
     
     return channel
 
@@ -191,34 +332,114 @@ def create_channel(
 @router.get("/workspaces/{workspace_id}/channels", response_model=List[ChannelResponse])
 def list_channels(
     workspace_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user_id: uuid.UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
-    """List channels the user is a member of"""
-    # Get channel IDs user is a member of
-    member_channel_ids = db.query(ChannelMember.channel_id).filter(
-        ChannelMember.user_id == current_user.id
-    ).subquery()
-    
-    channels = (
-        db.query(Channel)
+    """
+    List channels the user is a member of, with per-user unread badges and
+    a preview of the newest visible message, in a single query. Answered
+    from response_cache (or 304) until a write in the workspace.
+    """
+    return response_cache.respond(
+        request, db, current_user_id, ((CHANNELS, workspace_id),), List[ChannelResponse],
+        lambda: _list_channels(db, workspace_id, current_user_id),
+    )
+
+
+def _list_channels(db: Session, workspace_id: uuid.UUID, user_id: uuid.UUID) -> List[ChannelResponse]:
+    hidden = exists().where(
+        HiddenMessage.user_id == user_id,
+        HiddenMessage.message_id == Message.id,
+    )
+    last_message = (
+        select(
+            func.left(Message.content, LAST_MESSAGE_PREVIEW_LENGTH).label("preview"),
+            Message.file_type.label("file_type"),
+            User.name.label("user_name"),
+        )
+        .join(User, User.id == Message.user_id)
+        .where(
+            Message.channel_id == Channel.id,
+            or_(
+                ChannelMember.cleared_before.is_(None),
+                Message.created_at > ChannelMember.cleared_before,
+            ),
+            ~hidden,
+        )
+        .order_by(Message.created_at.desc())
+        .limit(1)
+        .lateral("last_message")
+    )
+
+    rows = (
+        db.query(
+            Channel,
+            ChannelMember.unread_count,
+            last_message.c.preview,
+            last_message.c.user_name,
+            last_message.c.file_type,
+        )
+        .join(
+            ChannelMember,
+            and_(
+                ChannelMember.channel_id == Channel.id,
+                ChannelMember.user_id == user_id,
+            ),
+        )
+        .outerjoin(last_message, true())
         .filter(
             Channel.workspace_id == workspace_id,
-            Channel.id.in_(member_channel_ids)
+            Channel.deleted_at.is_(None),
         )
         .order_by(desc(Channel.last_message_at))
         .all()
     )
-    
-    for channel in channels:
-        channel.is_member = True
-    
-    return channels
+
+    return [
+        ChannelResponse.model_validate(channel).model_copy(
+            update={
+                "is_member": True,
+                "unread_count": unread_count,
+                "last_message_preview": preview,
+                "last_message_user_name": user_name,
+                "last_message_file_type": file_type,
+            }
+        )
+        for channel, unread_count, preview, user_name, file_type in rows
+    ]
+
+
+@router.post("/channels/{channel_id}/read", status_code=204)
+def mark_channel_read(
+    channel_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Mark everything in the channel as read for the current user."""
+    _get_live_channel(db, channel_id)
+    now = datetime.now()
+    updated = db.query(ChannelMember).filter(
+        ChannelMember.channel_id == channel_id,
+        ChannelMember.user_id == current_user.id,
+    ).update(
+        {ChannelMember.last_read_message_at: now, ChannelMember.unread_count: 0},
+        synchronize_session=False
+    )
+
+    if not updated:
+        raise HTTPException(status_code=403, detail="Not a member of this channel")
+
+    _bump_workspace_views(db, channel_id, CHANNELS)
+    db.commit()
+    # Lets senders' read receipts catch up with the next flush
+    receipts.ack_threadsafe(channel_id, current_user.id, RECEIPT_READ, now)
+    return Response(status_code=204)
 
 
 # ============ FILE UPLOAD & DOWNLOAD ROUTES ============
 
-@router.post("/upload")
+@router.post("/upload", dependencies=[Depends(rate_limit("uploads"))])
 async def upload_file(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
@@ -294,17 +515,34 @@ def download_file(
 
 # ============ MESSAGE ROUTES ============
 
-@router.post("/channels/{channel_id}/messages", response_model=MessageResponse)
+@router.post(
+    "/channels/{channel_id}/messages",
+    response_model=MessageResponse,
+    dependencies=[Depends(rate_limit("messages"))],
+)
 def create_message(
     channel_id: uuid.UUID,
     message_data: MessageCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    channel = db.query(Channel).filter(Channel.id == channel_id).first()
+    channel = db.query(Channel).filter(
+        Channel.id == channel_id,
+        Channel.deleted_at.is_(None),
+    ).first()
     if not channel:
         raise HTTPException(status_code=404, detail="Channel not found")
 
+    # A reply into another channel would pin its parent there, blocking that
+    # channel's deletion
+    if message_data.parent_message_id:
+        parent_in_channel = db.query(Message.id).filter(
+            Message.id == message_data.parent_message_id,
+            Message.channel_id == channel_id,
+        ).first()
+        if not parent_in_channel:
+            raise HTTPException(status_code=400, detail="Reply target not found in this channel")
+
     now = datetime.now()
 
     print(f"[MESSAGE] Creating: '{(message_data.content or '')[:50]}'")
@@ -327,7 +565,11 @@ def create_message(
     )
 
     db.add(msg)
+    db.flush()
     channel.last_message_at = now
+    _record_new_messages(db, channel_id, current_user.id, 1, now)
+    SyncService.record(db, channel_id, sync.MESSAGE_CREATED, msg.id, current_user.id)
+    versions.bump(db, (CHANNELS, channel.workspace_id))
     db.commit()
     db.refresh(msg)
 
@@ -355,6 +597,105 @@ def create_message(
     return msg
 
 
+@router.post(
+    "/channels/{channel_id}/messages/batch",
+    response_model=List[MessageResponse],
+)
+def create_messages_batch(
+    channel_id: uuid.UUID,
+    batch: MessageBatchCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Post many messages to one channel (history imports, bots) in a single
+    transaction: one channel lookup, one multi-row INSERT for the messages
+    and one for the change log, one badge update and one broadcast frame.
+    Messages keep their list order; a reply to a message of the same batch
+    names it by list position in `parent_index`. No AI pass; use
+    /ai-process per message.
+    """
+    items = batch.messages
+    for index, item in enumerate(items):
+        if not item.content and not item.file_url:
+            raise HTTPException(status_code=400, detail=f"Message {index} has no content or file")
+        if item.parent_index is not None:
+            if item.parent_message_id:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Message {index} sets both parent_message_id and parent_index",
+                )
+            if item.parent_index >= index:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Message {index} can only reply to an earlier message of the batch",
+                )
+    # Imports get their own allowance, counted per message rather than per request
+    limiter.enforce("batch_messages", str(current_user.id), cost=len(items))
+
+    channel = db.query(Channel).filter(
+        Channel.id == channel_id,
+        Channel.deleted_at.is_(None),
+    ).first()
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
+
+    # A bad reply target would otherwise fail the whole INSERT on its foreign key;
+    # targets inside the batch were checked above
+    parent_ids = {item.parent_message_id for item in items if item.parent_message_id}
+    if parent_ids:
+        found = set(db.execute(
+            select(Message.id).where(Message.id.in_(parent_ids), Message.channel_id == channel_id)
+        ).scalars())
+        if found != parent_ids:
+            raise HTTPException(status_code=400, detail="Reply target not found in this channel")
+
+    # Ids and timestamps are assigned here, so nothing has to be read back;
+    # a microsecond apart so scrollback order matches the list order
+    now = datetime.now()
+    ids = [uuid.uuid4() for _ in items]
+    rows = []
+    for index, item in enumerate(items):
+        at = now + timedelta(microseconds=index)
+        rows.append({
+            "id": ids[index],
+            "channel_id": channel_id,
+            "user_id": current_user.id,
+            "content": item.content or "",
+            "status_tag": item.status_tag,
+            "parent_message_id": (
+                ids[item.parent_index] if item.parent_index is not None else item.parent_message_id
+            ),
+            "file_url": item.file_url,
+            "file_type": item.file_type,
+            "file_name": item.file_name,
+            "is_pinned": False,
+            "delivery_status": "sent",
+            "ai_processed": False,
+            "created_at": at,
+            "updated_at": at,
+        })
+
+    last_at = rows[-1]["created_at"]
+    db.execute(insert(Message), rows)
+    channel.last_message_at = last_at
+    _record_new_messages(db, channel_id, current_user.id, len(rows), last_at)
+    SyncService.record_many(db, channel_id, sync.MESSAGE_CREATED, [row["id"] for row in rows], current_user.id)
+    versions.bump(db, (CHANNELS, channel.workspace_id))
+    db.commit()
+
+    created = [MessageResponse(**row, user_name=current_user.name) for row in rows]
+    print(f"[MESSAGE] Batch of {len(created)} into {channel_id}")
+
+    # One frame for the whole batch instead of one per message
+    manager.notify_threadsafe(manager.broadcast_to_channel, {
+        "type": "messages",
+        "sender_id": str(current_user.id),
+        "data": [message.model_dump(mode="json") for message in created],
+    }, channel_id)
+    return created
+
+
 @router.get("/channels/{channel_id}/messages", response_model=List[MessageResponse])
 def list_messages(
     channel_id: uuid.UUID,
@@ -364,17 +705,26 @@ def list_messages(
     db: Session = Depends(get_db),
 ):
     print(f"[MESSAGES] Fetching for channel: {channel_id}")
+    _get_live_channel(db, channel_id)
 
     hidden_ids_subq = db.query(HiddenMessage.message_id).filter(
         HiddenMessage.user_id == current_user.id
     )
 
+    cleared_before = db.query(ChannelMember.cleared_before).filter(
+        ChannelMember.channel_id == channel_id,
+        ChannelMember.user_id == current_user.id,
+    ).scalar()
+
+    query = db.query(Message).filter(
+        Message.channel_id == channel_id,
+        Message.id.notin_(hidden_ids_subq), # Using notin_ for cleaner readability
+    )
+    if cleared_before:
+        query = query.filter(Message.created_at > cleared_before)
+
     messages = (
-        db.query(Message)
-        .filter(
-            Message.channel_id == channel_id,
-            Message.id.notin_(hidden_ids_subq), # Using notin_ for cleaner readability
-        )
+        query
         .order_by(Message.created_at.asc())
         .offset(skip)
         .limit(limit)
@@ -387,6 +737,21 @@ def list_messages(
         user = db.query(User).filter(User.id == message.user_id).first()
         message.user_name = user.name if user else "Unknown"
 
+    counts = _reaction_counts(db, [message.id for message in messages], current_user.id)
+    for message in messages:
+        message.reaction_counts = counts.get(message.id, [])
+
+    # Receipts for the caller's own messages come from the channel-wide
+    # watermarks: one aggregate, however many members or messages
+    if any(message.user_id == current_user.id for message in messages):
+        marks = ReceiptService.watermarks(db, [channel_id]).get(channel_id)
+        for message in messages:
+            if message.user_id == current_user.id:
+                # Not a change to persist; keep it out of the unit of work
+                set_committed_value(
+                    message, "delivery_status", ReceiptService.status_for(message.created_at, marks)
+                )
+
     return messages
 
 
@@ -396,23 +761,105 @@ def pin_message(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    message = db.query(Message).filter(Message.id == message_id).first()
-    if not message:
-        raise HTTPException(status_code=404, detail="Message not found")
+    message = _get_live_message(db, message_id)
 
     message.is_pinned = True
+    SyncService.record(db, message.channel_id, sync.MESSAGE_PINNED, message.id, current_user.id)
     db.commit()
     return {"pinned": True}
 
 
-@router.post("/messages/{message_id}/reactions")
+def _get_reactable_message(db: Session, message_id: uuid.UUID, user_id: uuid.UUID) -> Message:
+    message = _get_live_message(db, message_id)
+
+    is_member = db.query(ChannelMember.id).filter(
+        ChannelMember.channel_id == message.channel_id,
+        ChannelMember.user_id == user_id,
+    ).first()
+    if not is_member:
+        raise HTTPException(status_code=403, detail="Not a member of this channel")
+    return message
+
+
+def _publish_reaction(
+    db: Session, message: Message, emoji: str, user_id: uuid.UUID, added: bool
+) -> ReactionResponse:
+    """Record the change, commit, and push a delta frame with the new count"""
+    # Concurrent reactions to one message take turns from here to the commit,
+    # so each count includes every reaction committed before it
+    db.query(Message.id).filter(Message.id == message.id).with_for_update().scalar()
+    count = db.query(func.count(Reaction.id)).filter(
+        Reaction.message_id == message.id,
+        Reaction.emoji == emoji,
+    ).scalar()
+    SyncService.record(
+        db, message.channel_id, sync.REACTION_ADDED if added else sync.REACTION_REMOVED,
+        message.id, user_id, {"emoji": emoji, "count": count},
+    )
+    db.commit()
+
+    # Absolute count, so clients can apply frames idempotently
+    manager.notify_threadsafe(manager.broadcast_to_channel, {
+        "type": "reaction",
+        "action": "added" if added else "removed",
+        "message_id": str(message.id),
+        "user_id": str(user_id),
+        "emoji": emoji,
+        "count": count,
+    }, message.channel_id)
+    return ReactionResponse(message_id=message.id, emoji=emoji, count=count, reacted=added)
+
+
+@router.post("/messages/{message_id}/reactions", response_model=ReactionResponse)
 def add_reaction(
     message_id: uuid.UUID,
-    emoji: str,
+    reaction: ReactionCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    return {"success": True}
+    message = _get_reactable_message(db, message_id, current_user.id)
+
+    inserted = db.execute(
+        pg_insert(Reaction)
+        .values(message_id=message.id, user_id=current_user.id, emoji=reaction.emoji)
+        .on_conflict_do_nothing(constraint="uq_reactions_message_id_user_id_emoji")
+        .returning(Reaction.id)
+    ).first()
+
+    if not inserted:
+        # Already reacted: nothing changed, nothing to broadcast
+        count = db.query(func.count(Reaction.id)).filter(
+            Reaction.message_id == message.id,
+            Reaction.emoji == reaction.emoji,
+        ).scalar()
+        return ReactionResponse(message_id=message.id, emoji=reaction.emoji, count=count, reacted=True)
+
+    return _publish_reaction(db, message, reaction.emoji, current_user.id, added=True)
+
+
+@router.delete("/messages/{message_id}/reactions", response_model=ReactionResponse)
+def remove_reaction(
+    message_id: uuid.UUID,
+    emoji: str = Query(..., min_length=1, max_length=10),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    message = _get_reactable_message(db, message_id, current_user.id)
+
+    removed = db.query(Reaction).filter(
+        Reaction.message_id == message.id,
+        Reaction.user_id == current_user.id,
+        Reaction.emoji == emoji,
+    ).delete(synchronize_session=False)
+
+    if not removed:
+        count = db.query(func.count(Reaction.id)).filter(
+            Reaction.message_id == message.id,
+            Reaction.emoji == emoji,
+        ).scalar()
+        return ReactionResponse(message_id=message.id, emoji=emoji, count=count, reacted=False)
+
+    return _publish_reaction(db, message, emoji, current_user.id, added=False)
 
 
 # ----- DELETE MESSAGE (EVERYONE) -----
@@ -424,16 +871,47 @@ def delete_message_for_everyone(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    message = db.query(Message).filter(Message.id == message_id).first()
-    if not message:
-        raise HTTPException(status_code=404, detail="Message not found")
+    message = _get_live_message(db, message_id)
 
     if message.user_id != current_user.id:
         raise HTTPException(
             status_code=403, detail="Not allowed to delete this message"
         )
 
+    # Take the message back out of badges of members who had not read it yet;
+    # members who cleared or hid it already had it taken off theirs
+    hidden = (
+        select(HiddenMessage.message_id)
+        .where(
+            HiddenMessage.user_id == ChannelMember.user_id,
+            HiddenMessage.message_id == message.id,
+        )
+        .correlate(ChannelMember)
+    )
+    db.query(ChannelMember).filter(
+        ChannelMember.channel_id == message.channel_id,
+        ChannelMember.user_id != message.user_id,
+        ChannelMember.unread_count > 0,
+        or_(
+            ChannelMember.last_read_message_at.is_(None),
+            ChannelMember.last_read_message_at < message.created_at,
+        ),
+        or_(
+            ChannelMember.cleared_before.is_(None),
+            ChannelMember.cleared_before < message.created_at,
+        ),
+        ~hidden.exists(),
+    ).update(
+        {ChannelMember.unread_count: ChannelMember.unread_count - 1},
+        synchronize_session=False
+    )
+
+    SyncService.record(db, message.channel_id, sync.MESSAGE_DELETED, message.id, current_user.id)
+    db.query(Reaction).filter(Reaction.message_id == message.id).delete(synchronize_session=False)
+    db.query(HiddenMessage).filter(HiddenMessage.message_id == message.id).delete(synchronize_session=False)
+    channel_id = message.channel_id
     db.delete(message)
+    _bump_workspace_views(db, channel_id, CHANNELS)
     db.commit()
     return Response(status_code=204)
 
@@ -447,9 +925,7 @@ def delete_message_for_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    message = db.query(Message).filter(Message.id == message_id).first()
-    if not message:
-        raise HTTPException(status_code=404, detail="Message not found")
+    message = _get_live_message(db, message_id)
 
     exists = (
         db.query(HiddenMessage)
@@ -461,7 +937,27 @@ def delete_message_for_me(
     )
 
     if not exists:
+        channel_id = message.channel_id
         db.add(HiddenMessage(user_id=current_user.id, message_id=message_id))
+        if message.user_id != current_user.id:
+            # Hiding a message the member had not read yet takes it off the badge
+            db.query(ChannelMember).filter(
+                ChannelMember.channel_id == channel_id,
+                ChannelMember.user_id == current_user.id,
+                ChannelMember.unread_count > 0,
+                or_(
+                    ChannelMember.last_read_message_at.is_(None),
+                    ChannelMember.last_read_message_at < message.created_at,
+                ),
+                or_(
+                    ChannelMember.cleared_before.is_(None),
+                    ChannelMember.cleared_before < message.created_at,
+                ),
+            ).update(
+                {ChannelMember.unread_count: ChannelMember.unread_count - 1},
+                synchronize_session=False
+            )
+        _bump_workspace_views(db, channel_id, CHANNELS)
         db.commit()
 
     return Response(status_code=204)
@@ -470,7 +966,11 @@ def delete_message_for_me(
 # ---------- FORWARD MESSAGE ----------
 
 
-@router.post("/messages/{message_id}/forward", response_model=MessageResponse)
+@router.post(
+    "/messages/{message_id}/forward",
+    response_model=MessageResponse,
+    dependencies=[Depends(rate_limit("messages"))],
+)
 def forward_message(
     message_id: uuid.UUID,
     req: ForwardRequest,
@@ -478,9 +978,7 @@ def forward_message(
     db: Session = Depends(get_db),
 ):
     """Forward a message to another channel."""
-    original = db.query(Message).filter(Message.id == message_id).first()
-    if not original:
-        raise HTTPException(status_code=404, detail="Message not found")
+    original = _get_live_message(db, message_id)
 
     source_channel = db.query(Channel).filter(
         Channel.id == original.channel_id
@@ -495,7 +993,7 @@ def forward_message(
     if req.target_channel_id:
         target_channel = (
             db.query(Channel)
-            .filter(Channel.id == req.target_channel_id)
+            .filter(Channel.id == req.target_channel_id, Channel.deleted_at.is_(None))
             .first()
         )
     elif req.target_channel_name:
@@ -504,6 +1002,7 @@ def forward_message(
             .filter(
                 Channel.workspace_id == source_channel.workspace_id,
                 Channel.name == req.target_channel_name,
+                Channel.deleted_at.is_(None),
             )
             .first()
         )
@@ -530,7 +1029,14 @@ def forward_message(
     )
 
     db.add(new_message)
+    db.flush()
     target_channel.last_message_at = now
+    _record_new_messages(db, target_channel.id, current_user.id, 1, now)
+    SyncService.record(
+        db, target_channel.id, sync.MESSAGE_CREATED, new_message.id, current_user.id,
+        {"forwarded_from": str(original.id)},
+    )
+    versions.bump(db, (CHANNELS, target_channel.workspace_id))
     db.commit()
     db.refresh(new_message)
 
@@ -541,16 +1047,18 @@ def forward_message(
 # ============ IDEAS ROUTES ============
 
 
-@router.post("/messages/{message_id}/convert-to-idea", response_model=IdeaResponse)
+@router.post(
+    "/messages/{message_id}/convert-to-idea",
+    response_model=IdeaResponse,
+    dependencies=[Depends(rate_limit("ideas"))],
+)
 def convert_message_to_idea(
     message_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Convert a message (and its attached file, if any) into an Idea."""
-    message = db.query(Message).filter(Message.id == message_id).first()
-    if not message:
-        raise HTTPException(status_code=404, detail="Message not found")
+    message = _get_live_message(db, message_id)
 
     text_parts: List[str] = []
 
@@ -562,7 +1070,8 @@ def convert_message_to_idea(
         file_path = UPLOAD_DIR / filename
 
         if file_path.exists():
-            file_text = extract_text_from_file(file_path, message.file_type)
+            with extraction_gate.admit():
+                file_text = extract_text_from_file(file_path, message.file_type)
             if file_text:
                 text_parts.append(file_text)
         else:
@@ -579,31 +1088,84 @@ def convert_message_to_idea(
     db.commit()
     db.refresh(message)
 
-    idea = IdeasService.create_idea_from_message(db, message_id)
+    idea = IdeasService.create_idea_from_message(db, message_id, current_user.id)
     if not idea:
         raise HTTPException(
             status_code=500, detail="Failed to create idea from message"
         )
 
+    # The message text (channel preview), the idea and maybe a calendar event
+    # changed, over several commits inside the service; bump once they all landed
+    _bump_workspace_views(db, idea.channel_id, CHANNELS, IDEAS, CALENDAR)
+    db.commit()
+    db.refresh(idea)
+
     return idea
 
 
 @router.get("/workspaces/{workspace_id}/ideas", response_model=List[IdeaResponse])
 def get_ideas(
     workspace_id: uuid.UUID,
+    request: Request,
     status: Optional[str] = None,
     category: Optional[str] = None,
     priority: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user_id: uuid.UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
+    """Every idea of the workspace, newest first. Prefer /ideas/page for large workspaces."""
+    filters = {
+        "status": status,
+        "category": category,
+        "priority": priority,
+    }
+    return response_cache.respond(
+        request, db, current_user_id, ((IDEAS, workspace_id),), List[IdeaResponse],
+        lambda: IdeasService.get_all_ideas(db, workspace_id, filters),
+    )
+
+
+@router.get("/workspaces/{workspace_id}/ideas/page", response_model=IdeaPage)
+def get_ideas_page(
+    workspace_id: uuid.UUID,
+    request: Request,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Newest ideas first; pass `next_cursor` back as `cursor` for the next page."""
     filters = {
         "status": status,
         "category": category,
         "priority": priority,
     }
-    ideas = IdeasService.get_all_ideas(db, workspace_id, filters)
-    return ideas
+
+    def build():
+        try:
+            ideas, next_cursor = IdeasService.get_ideas_page(db, workspace_id, filters, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"ideas": ideas, "next_cursor": next_cursor}
+
+    return response_cache.respond(request, db, current_user_id, ((IDEAS, workspace_id),), IdeaPage, build)
+
+
+@router.get("/workspaces/{workspace_id}/ideas/facets", response_model=IdeaFacetsResponse)
+def get_idea_facets(
+    workspace_id: uuid.UUID,
+    request: Request,
+    current_user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    """Idea counts per status, category and priority for the hub's filters."""
+    return response_cache.respond(
+        request, db, current_user_id, ((IDEAS, workspace_id),), IdeaFacetsResponse,
+        lambda: IdeasService.get_facets(db, workspace_id),
+    )
 
 
 @router.patch("/ideas/{idea_id}", response_model=IdeaResponse)
@@ -625,6 +1187,7 @@ def update_idea(
         if not idea.calendar_event_id:
             IdeasService.create_calendar_event(db, idea)
 
+    _bump_workspace_views(db, idea.channel_id, IDEAS, CALENDAR)
     db.commit()
     db.refresh(idea)
     return idea
@@ -638,13 +1201,65 @@ def update_idea(
 )
 def get_calendar_events(
     workspace_id: uuid.UUID,
+    request: Request,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    current_user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db),
+):
+    return response_cache.respond(
+        request, db, current_user_id, ((CALENDAR, workspace_id),), List[CalendarEventResponse],
+        lambda: CalendarService.get_events(db, workspace_id, start_date, end_date),
+    )
+
+
+# ============ SEARCH ROUTES ============
+
+
+@router.get("/search", response_model=SearchResponse)
+def search(
+    q: str,
+    channel_id: Optional[uuid.UUID] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    events = CalendarService.get_events(db, workspace_id, start_date, end_date)
-    return events
+    """Full-text search over messages, file names and ideas in the user's channels."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+
+    try:
+        results, next_cursor = SearchService.search(
+            db, current_user.id, q, channel_id=channel_id, cursor=cursor, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"results": results, "next_cursor": next_cursor}
+
+
+# ============ SYNC ROUTES ============
+
+
+@router.get("/sync", response_model=SyncResponse)
+def sync_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Changes (creates, deletes, pins, idea conversions, membership changes)
+    across the user's channels since `since`. Call without `since` to get the
+    current cursor; keep calling while has_more is true.
+    """
+    try:
+        changes, cursor, has_more = SyncService.changes_since(db, current_user.id, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"changes": changes, "cursor": cursor, "has_more": has_more}
 
 
 # ============ AI SUGGESTIONS ROUTE ============
@@ -656,9 +1271,7 @@ def process_message_with_ai(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    message = db.query(Message).filter(Message.id == message_id).first()
-    if not message:
-        raise HTTPException(status_code=404, detail="Message not found")
+    message = _get_live_message(db, message_id)
 
     try:
         ai_result = AIAssistant.process_message(message.content, {})
@@ -693,112 +1306,77 @@ def clear_channel_for_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Mark all messages in this channel as 'hidden' for the current user."""
-    channel = db.query(Channel).filter(Channel.id == channel_id).first()
-    if not channel:
-        raise HTTPException(status_code=404, detail="Channel not found")
+    """Hide all current messages in this channel for the current user."""
+    _get_live_channel(db, channel_id)
 
-    message_ids = db.query(Message.id).filter(Message.channel_id == channel_id).all()
+    # Move the member's watermark instead of writing a HiddenMessage per
+    # message; list_messages filters everything at or before it.
+    now = datetime.now()
+    updated = db.query(ChannelMember).filter(
+        ChannelMember.channel_id == channel_id,
+        ChannelMember.user_id == current_user.id,
+    ).update(
+        {
+            ChannelMember.cleared_before: now,
+            ChannelMember.last_read_message_at: now,
+            ChannelMember.unread_count: 0,
+        },
+        synchronize_session=False
+    )
 
-    for (mid,) in message_ids:
-        exists = (
-            db.query(HiddenMessage)
-            .filter(
-                HiddenMessage.user_id == current_user.id,
-                HiddenMessage.message_id == mid,
-            )
-            .first()
-        )
-        if not exists:
-            db.add(HiddenMessage(user_id=current_user.id, message_id=mid))
+    if not updated:
+        raise HTTPException(status_code=403, detail="Not a member of this channel")
 
+    _bump_workspace_views(db, channel_id, CHANNELS)
     db.commit()
     return Response(status_code=204)
 
 
-@router.delete("/channels/{channel_id}", status_code=204)
+@router.delete("/channels/{channel_id}", status_code=202, response_model=ChannelDeletionResponse)
 def delete_channel(
     channel_id: uuid.UUID,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Delete a channel for everyone."""
+    """
+    Delete a channel for everyone.
+    The channel is tombstoned immediately; its messages, ideas, events and
+    uploads are reclaimed in batches by the cleanup worker. Poll
+    GET /channels/{channel_id}/deletion for progress.
+    """
     channel = db.query(Channel).filter(Channel.id == channel_id).first()
     if not channel:
         raise HTTPException(status_code=404, detail="Channel not found")
 
-    # 1. Authorization Check (Keep this)
     # The logic here assumes a user can only delete a channel in their own workspace.
     if current_user.workspace_id and current_user.workspace_id != channel.workspace_id:
         raise HTTPException(
             status_code=403, detail="Not allowed to delete this channel"
         )
-    
-    # ----------------------------------------------------------------------
-    # 2. RESOLVE FOREIGN KEY REFERENCES (users.channel_id)
-    # ----------------------------------------------------------------------
-    # This step is necessary because the 'users' table references 'channels'.
-    # This assumes you have run the migration to make users.channel_id NULLABLE.
-    db.query(User).filter(User.channel_id == channel_id).update(
-        {User.channel_id: None}, 
-        synchronize_session=False
-    )
-    
-    # NOTE: No commit here yet. We must maintain atomicity.
-    # ----------------------------------------------------------------------
-    # 3. CASCADE DELETION VIA BULK OPERATIONS
-    # ----------------------------------------------------------------------
-    
-    # Identify Messages associated with the channel (Used for Ideas/HiddenMessages)
-    message_ids_subq = (
-        db.query(Message.id)
-        .filter(Message.channel_id == channel_id)
-        .subquery()
-    )
 
-    # Identify Ideas associated with those messages
-    idea_ids_subq = (
-        db.query(Idea.id)
-        .filter(Idea.message_id.in_(message_ids_subq))
-        .subquery()
-    )
+    job = ChannelCleanupService.request_deletion(db, channel, current_user.id)
+    cleanup_worker.wake()
+    discover_cache.clear()
+    manager.notify_threadsafe(manager.close_channel, channel_id)
 
-    # Delete Calendar Events linked to Ideas
-    db.query(CalendarEvent).filter(
-        CalendarEvent.idea_id.in_(idea_ids_subq)
-    ).delete(synchronize_session=False)
+    return job
 
-    # Delete Ideas
-    db.query(Idea).filter(
-        Idea.id.in_(idea_ids_subq)
-    ).delete(synchronize_session=False)
 
-    # Delete Hidden Messages (references messages that are about to be deleted)
-    db.query(HiddenMessage).filter(
-        HiddenMessage.message_id.in_(message_ids_subq)
-    ).delete(synchronize_session=False)
-    
-    # Delete Channel Memberships (references the channel being deleted)
-    db.query(ChannelMember).filter(
-        ChannelMember.channel_id == channel_id
-    ).delete(synchronize_session=False)
+@router.get("/channels/{channel_id}/deletion", response_model=ChannelDeletionResponse)
+def get_channel_deletion_status(
+    channel_id: uuid.UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Progress of a background channel deletion."""
+    job = db.query(ChannelDeletion).filter(ChannelDeletion.channel_id == channel_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="No deletion requested for this channel")
 
-    # Delete Messages (references the channel being deleted)
-    db.query(Message).filter(
-        Message.channel_id == channel_id
-    ).delete(synchronize_session=False)
-    
-    # ----------------------------------------------------------------------
-    # 4. FINAL DELETION & COMMIT (The entire block executes as one transaction)
-    # ----------------------------------------------------------------------
-    
-    # Delete the Channel object itself
-    db.delete(channel) 
-    
-    # Commit all changes at once
-    db.commit()
+    if current_user.workspace_id and current_user.workspace_id != job.workspace_id:
+        raise HTTPException(status_code=403, detail="Not allowed to view this deletion")
 
-    return Response(status_code=204)
+    return job
 
 
 # ============ PUBLIC CHANNEL DISCOVERY ============
@@ -810,22 +1388,68 @@ def discover_channels(
     db: Session = Depends(get_db),
 ):
     """Discover public channels (search and browse)"""
-    query = db.query(Channel).filter(Channel.is_public == True)
-    
-    if search:
-        query = query.filter(Channel.name.ilike(f"%{search}%"))
-    
-    channels = query.order_by(desc(Channel.member_count)).limit(50).all()
-    
-    # Check if user is already a member of each channel
-    for channel in channels:
-        is_member = db.query(ChannelMember).filter(
-            ChannelMember.channel_id == channel.id,
-            ChannelMember.user_id == current_user.id
-        ).first() is not None
-        channel.is_member = is_member
-    
-    return channels
+    term = (search or "").strip().lower()
+
+    # Type-ahead hits the same few prefixes over and over. Only the matching
+    # (name search) is shared across users and cached; member counts change
+    # on every join/leave, so they are re-read with is_member by primary key.
+    cached = discover_cache.get(term)
+    if cached is not None:
+        channel_ids = [channel.id for channel in cached]
+        current = {
+            channel_id: (member_count, membership_id is not None)
+            for channel_id, member_count, membership_id in db.query(
+                Channel.id, Channel.member_count, ChannelMember.id
+            ).outerjoin(
+                ChannelMember,
+                and_(
+                    ChannelMember.channel_id == Channel.id,
+                    ChannelMember.user_id == current_user.id,
+                ),
+            ).filter(
+                Channel.id.in_(channel_ids),
+                Channel.deleted_at.is_(None),
+            )
+        } if channel_ids else {}
+        channels = [
+            channel.model_copy(update={
+                "member_count": current[channel.id][0],
+                "is_member": current[channel.id][1],
+            })
+            for channel in cached
+            if channel.id in current
+        ]
+        return sorted(channels, key=lambda channel: channel.member_count, reverse=True)
+
+    query = (
+        db.query(Channel, ChannelMember.id)
+        .outerjoin(
+            ChannelMember,
+            and_(
+                ChannelMember.channel_id == Channel.id,
+                ChannelMember.user_id == current_user.id,
+            ),
+        )
+        .filter(Channel.is_public == True, Channel.deleted_at.is_(None))
+    )
+
+    if term:
+        # Served by the ix_channels_name_trgm GIN index
+        query = query.filter(Channel.name.ilike(f"%{_escape_like(term)}%", escape="\\"))
+
+    rows = query.order_by(desc(Channel.member_count)).limit(50).all()
+
+    channels = []
+    is_member = []
+    for channel, membership_id in rows:
+        channels.append(ChannelResponse.model_validate(channel))
+        is_member.append(membership_id is not None)
+    discover_cache.set(term, channels)
+
+    return [
+        channel.model_copy(update={"is_member": member})
+        for channel, member in zip(channels, is_member)
+    ]
 
 
 @router.post("/channels/{channel_id}/join")
@@ -835,7 +1459,10 @@ def join_channel(
     db: Session = Depends(get_db),
 ):
     """Join a public channel"""
-    channel = db.query(Channel).filter(Channel.id == channel_id).first()
+    channel = db.query(Channel).filter(
+        Channel.id == channel_id,
+        Channel.deleted_at.is_(None),
+    ).first()
     if not channel:
         raise HTTPException(status_code=404, detail="Channel not found")
     
@@ -864,7 +1491,9 @@ def join_channel(
     channel.member_count = db.query(ChannelMember).filter(
         ChannelMember.channel_id == channel_id
     ).count()
-    
+    SyncService.record(db, channel_id, sync.MEMBER_JOINED, current_user.id, current_user.id)
+    versions.bump(db, (CHANNELS, channel.workspace_id), (MEMBERS, channel_id))
+
     db.commit()
     
     return {"message": "Joined successfully", "channel_id": str(channel_id)}
@@ -878,9 +1507,7 @@ def leave_channel(
 ):
     """Leave a channel"""
     # Retrieve channel object (REQUIRED to access attributes like created_by)
-    channel = db.query(Channel).filter(Channel.id == channel_id).first()
-    if not channel:
-        raise HTTPException(status_code=404, detail="Channel not found")
+    channel = _get_live_channel(db, channel_id)
     
     # Check if user is the creator
     if channel.created_by == current_user.id:
@@ -903,8 +1530,13 @@ def leave_channel(
         channel.member_count = db.query(ChannelMember).filter(
             ChannelMember.channel_id == channel_id
         ).count()
-        
+        SyncService.record(db, channel_id, sync.MEMBER_LEFT, current_user.id, current_user.id)
+        versions.bump(db, (CHANNELS, channel.workspace_id), (MEMBERS, channel_id))
+
         db.commit()
+
+        # Sockets cache membership for their lifetime; push the revocation
+        manager.notify_threadsafe(manager.revoke_membership, channel_id, current_user.id)
     
     return Response(status_code=204)
 
@@ -912,26 +1544,34 @@ def leave_channel(
 @router.get("/channels/{channel_id}/members", response_model=List[ChannelMemberResponse])
 def get_channel_members(
     channel_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user_id: uuid.UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
 ):
     """Get all members of a channel"""
-    # Check if user is a member
-    is_member = db.query(ChannelMember).filter(
-        ChannelMember.channel_id == channel_id,
-        ChannelMember.user_id == current_user.id
-    ).first()
-    
-    if not is_member:
-        raise HTTPException(status_code=403, detail="Not a member of this channel")
-    
-    members = db.query(ChannelMember).filter(
-        ChannelMember.channel_id == channel_id
-    ).all()
-    
-    # Add user names
-    for member in members:
-        user = db.query(User).filter(User.id == member.user_id).first()
-        member.user_name = user.name if user else "Unknown"
-    
-    return members
\ No newline at end of file
+    def build():
+        _get_live_channel(db, channel_id)
+        # Check if user is a member
+        is_member = db.query(ChannelMember).filter(
+            ChannelMember.channel_id == channel_id,
+            ChannelMember.user_id == current_user_id
+        ).first()
+
+        if not is_member:
+            raise HTTPException(status_code=403, detail="Not a member of this channel")
+
+        members = db.query(ChannelMember).filter(
+            ChannelMember.channel_id == channel_id
+        ).all()
+
+        # Add user names
+        for member in members:
+            user = db.query(User).filter(User.id == member.user_id).first()
+            member.user_name = user.name if user else "Unknown"
+
+        return members
+
+    # Cached per caller, so a membership change (which bumps MEMBERS) re-runs the check
+    return response_cache.respond(
+        request, db, current_user_id, ((MEMBERS, channel_id),), List[ChannelMemberResponse], build,
+    )
\ No newline at end of file
@@ -0,0 +1,262 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hmac
+import sys
+import threading
+import time
+import traceback
+
+from .config import settings
+
+router = APIRouter()
+
+# Our own helper threads, left out of profiles
+_QUIET_THREADS = {"stack-sampler", "loop-watchdog"}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _thread_stack(frame) -> List[str]:
+    """Root-first labels for a thread's current stack"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class StackSampler:
+    """
+    Wall-clock sampling profiler. A background thread snapshots every
+    thread's stack with sys._current_frames() each `interval`, so the
+    event loop thread and the threadpool workers running sync routes are
+    covered without instrumenting anything. Cost is one stack walk per
+    thread per sample and nothing at all while not running.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        # (thread name, frame labels root-first) -> samples
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                name = names.get(thread_id, f"thread-{thread_id}")
+                if name in _QUIET_THREADS:
+                    continue
+                self.samples[(name, tuple(_thread_stack(frame)))] += 1
+            self.sample_count += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format, one `thread;frame;...;frame count` per line"""
+        lines = [
+            ";".join((thread_name,) + stack) + f" {count}"
+            for (thread_name, stack), count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        """speedscope.app file with one sampled profile per thread"""
+        frames: List[dict] = []
+        frame_index: Dict[str, int] = {}
+        per_thread: Dict[str, Tuple[list, list]] = {}
+
+        for (thread_name, stack), count in self.samples.items():
+            indexes = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    name, _, location = label.rpartition(" (")
+                    file, _, line = location.rstrip(")").rpartition(":")
+                    frames.append({"name": name, "file": file, "line": int(line) if line.isdigit() else None})
+                indexes.append(frame_index[label])
+            samples, weights = per_thread.setdefault(thread_name, ([], []))
+            samples.append(indexes)
+            weights.append(count * self.interval)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread_name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+                for thread_name, (samples, weights) in sorted(per_thread.items())
+            ],
+            "name": f"teamchat {self.duration:.1f}s @ {self.interval * 1000:.0f}ms",
+            "exporter": "teamchat-sampler",
+        }
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a short sleep. Anything
+    run inline on the loop (a sync call inside an async route, bcrypt or
+    pdfplumber work not pushed to the threadpool) shows up as lag. A
+    watchdog thread notices when the loop has not checked in for
+    `stall_threshold` and logs the loop thread's stack at that moment,
+    which names the blocking call.
+    """
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = 0.25):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.last_tick = time.monotonic()
+        self.loop_thread_id: Optional[int] = None
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.recent: List[float] = []
+        self.counters = {"ticks": 0, "stalls": 0}
+        self.last_stall: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.last_tick = now
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.recent.append(lag)
+            if len(self.recent) > 600:
+                del self.recent[:100]
+            self.counters["ticks"] += 1
+
+    def _watch(self):
+        reported_tick = None
+        while not self._stop.wait(self.stall_threshold / 2):
+            tick = self.last_tick
+            blocked_for = time.monotonic() - tick - self.interval
+            if blocked_for < self.stall_threshold or tick == reported_tick:
+                continue
+            # One report per stall
+            reported_tick = tick
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = traceback.format_stack(frame, limit=12) if frame else []
+            self.counters["stalls"] += 1
+            self.last_stall = {"blocked_ms": round(blocked_for * 1000, 1), "stack": stack}
+            print(f"[LOOP_LAG] event loop blocked for {blocked_for * 1000:.0f}ms, at:\n{''.join(stack)}")
+
+    def stats(self) -> dict:
+        recent = sorted(self.recent)
+        p99 = recent[int(len(recent) * 0.99) - 1] if recent else 0.0
+        return {
+            "interval_ms": self.interval * 1000,
+            "last_lag_ms": round(self.last_lag * 1000, 2),
+            "p99_lag_ms": round(p99 * 1000, 2),
+            "max_lag_ms": round(self.max_lag * 1000, 2),
+            "last_stall": self.last_stall,
+            **self.counters,
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_LAG_INTERVAL_SECONDS,
+    stall_threshold=settings.LOOP_STALL_THRESHOLD_SECONDS,
+)
+
+# One profile at a time per worker; overlapping samplers would double the cost
+_profile_lock = asyncio.Lock()
+
+
+def _require_admin(token: Optional[str]):
+    # Without a configured token the endpoints do not exist
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=120),
+    interval_ms: float = Query(5.0, ge=1, le=100),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Sample this worker for `seconds` and return the stacks"""
+    _require_admin(x_admin_token)
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        sampler = StackSampler(interval=interval_ms / 1000)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+
+    print(f"[PROFILER] {sampler.sample_count} samples over {sampler.duration:.1f}s")
+    filename = f"teamchat-{int(time.time())}"
+    if format == "speedscope":
+        return JSONResponse(
+            sampler.speedscope(),
+            headers={"Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'},
+        )
+    return PlainTextResponse(
+        sampler.collapsed(),
+        headers={"Content-Disposition": f'attachment; filename="{filename}.folded"'},
+    )
+
+
+@router.get("/loop-lag")
+def loop_lag(x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    return loop_monitor.stats()
@@ -1,8 +1,10 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict
 from datetime import datetime
 import uuid
 
+from .config import settings
+
 # ---------------- USER ----------------
 
 class UserCreate(BaseModel):
@@ -64,6 +66,11 @@ class ChannelResponse(BaseModel):
     member_count: int
     last_message_at: Optional[datetime] = None
     is_member: Optional[bool] = None  # NEW - indicates if current user is a member
+    unread_count: Optional[int] = 0  # Per-user badge, filled by list_channels
+    # Chat-list preview of the newest visible message, filled by list_channels
+    last_message_preview: Optional[str] = None
+    last_message_user_name: Optional[str] = None
+    last_message_file_type: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -79,6 +86,21 @@ class ChannelMemberResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ChannelDeletionResponse(BaseModel):
+    channel_id: uuid.UUID
+    status: str
+    phase: str
+    rows_deleted: int
+    files_deleted: int
+    last_error: Optional[str] = None
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # ---------------- MESSAGE ----------------
 
 class MessageCreate(BaseModel):
@@ -91,6 +113,22 @@ class MessageCreate(BaseModel):
     type: Optional[str] = "text"
 
 
+class MessageBatchItem(MessageCreate):
+    # Reply to an earlier message of the same batch, by its list position
+    parent_index: Optional[int] = Field(default=None, ge=0)
+
+
+class MessageBatchCreate(BaseModel):
+    """Body used by /channels/{id}/messages/batch; stored in list order"""
+    messages: List[MessageBatchItem] = Field(min_length=1, max_length=settings.MESSAGE_BATCH_MAX_SIZE)
+
+
+class ReactionCount(BaseModel):
+    emoji: str
+    count: int
+    reacted: bool = False  # whether the current user is among them
+
+
 class MessageResponse(BaseModel):
     id: uuid.UUID
     channel_id: uuid.UUID
@@ -108,10 +146,23 @@ class MessageResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     user_name: Optional[str] = None
+    # Read from `reaction_counts`; `reactions` is the ORM relationship
+    reactions: List[ReactionCount] = Field(default_factory=list, validation_alias="reaction_counts")
 
     class Config:
         from_attributes = True
 
+
+class ReactionCreate(BaseModel):
+    emoji: str = Field(min_length=1, max_length=10)
+
+
+class ReactionResponse(BaseModel):
+    message_id: uuid.UUID
+    emoji: str
+    count: int
+    reacted: bool
+
 # ---------------- IDEA ----------------
 
 class IdeaCreate(BaseModel):
@@ -146,6 +197,23 @@ class IdeaResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class IdeaPage(BaseModel):
+    ideas: List[IdeaResponse]
+    next_cursor: Optional[str] = None
+
+
+class IdeaFacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+
+class IdeaFacetsResponse(BaseModel):
+    total: int
+    status: List[IdeaFacetCount]
+    category: List[IdeaFacetCount]
+    priority: List[IdeaFacetCount]
+
 # ---------------- CALENDAR ----------------
 
 class CalendarEventResponse(BaseModel):
@@ -157,4 +225,45 @@ class CalendarEventResponse(BaseModel):
     idea_id: Optional[uuid.UUID] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# ---------------- SEARCH ----------------
+
+class SearchResult(BaseModel):
+    kind: str  # "message" or "idea"
+    id: uuid.UUID
+    channel_id: uuid.UUID
+    message_id: Optional[uuid.UUID] = None
+    title: Optional[str] = None
+    snippet: str  # HTML-escaped content, matches wrapped in <mark>
+    rank: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    next_cursor: Optional[str] = None
+
+
+# ---------------- SYNC ----------------
+
+class ChangeResponse(BaseModel):
+    id: int
+    channel_id: uuid.UUID
+    kind: str
+    entity_id: Optional[uuid.UUID] = None
+    user_id: Optional[uuid.UUID] = None
+    payload: Optional[Dict] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SyncResponse(BaseModel):
+    changes: List[ChangeResponse]
+    cursor: str
+    has_more: bool
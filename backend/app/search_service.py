@@ -0,0 +1,159 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, union_all, literal, func, tuple_, cast, Float, or_
+from .models import Message, Idea, HiddenMessage, ChannelMember, Channel
+from datetime import datetime
+import base64
+import html
+import json
+import uuid
+
+SEARCH_CONFIG = "english"
+# ts_headline marks matches with private-use characters, not tags: the
+# snippet is HTML-escaped afterwards and the markers become <mark> then
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+
+
+def _render_snippet(headline: str) -> str:
+    """Escape user content, then turn the match markers into <mark> tags"""
+    return (
+        html.escape(headline or "")
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+class SearchService:
+
+    @staticmethod
+    def encode_cursor(rank: float, created_at: datetime, result_id: uuid.UUID) -> str:
+        """Opaque keyset cursor pointing just after the given result"""
+        raw = json.dumps([rank, created_at.isoformat(), str(result_id)])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Inverse of encode_cursor; raises ValueError on malformed input"""
+        try:
+            rank, created_at, result_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return float(rank), datetime.fromisoformat(created_at), uuid.UUID(result_id)
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+
+    @staticmethod
+    def search(
+        db: Session,
+        user_id: uuid.UUID,
+        q: str,
+        channel_id: uuid.UUID = None,
+        cursor: str = None,
+        limit: int = 20,
+    ):
+        """
+        Ranked search over message content, attachment names and idea titles.
+        Only channels the user belongs to are searched and messages the user
+        has hidden or cleared are skipped. Returns (rows, next_cursor).
+        """
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+        # Deleted channels keep their memberships until cleanup reaches them
+        member_channels = select(ChannelMember.channel_id).join(
+            Channel, Channel.id == ChannelMember.channel_id
+        ).where(
+            ChannelMember.user_id == user_id,
+            Channel.deleted_at.is_(None),
+        )
+        if channel_id:
+            member_channels = member_channels.where(ChannelMember.channel_id == channel_id)
+
+        # Messages the user has cleared from view via the member watermark
+        visible_membership = select(ChannelMember.id).where(
+            ChannelMember.user_id == user_id,
+            ChannelMember.channel_id == Message.channel_id,
+            or_(
+                ChannelMember.cleared_before.is_(None),
+                Message.created_at > ChannelMember.cleared_before,
+            ),
+        )
+
+        hidden_ids = select(HiddenMessage.message_id).where(HiddenMessage.user_id == user_id)
+
+        message_hits = select(
+            literal("message").label("kind"),
+            Message.id.label("id"),
+            Message.channel_id.label("channel_id"),
+            Message.id.label("message_id"),
+            Message.file_name.label("title"),
+            (func.coalesce(Message.content, "") + " " + func.coalesce(Message.file_name, "")).label("document"),
+            cast(func.ts_rank(Message.search_vector, ts_query), Float).label("rank"),
+            Message.created_at.label("created_at"),
+        ).where(
+            Message.search_vector.op("@@")(ts_query),
+            Message.channel_id.in_(member_channels),
+            visible_membership.exists(),
+            Message.id.notin_(hidden_ids),
+        )
+
+        idea_hits = select(
+            literal("idea").label("kind"),
+            Idea.id.label("id"),
+            Idea.channel_id.label("channel_id"),
+            Idea.message_id.label("message_id"),
+            Idea.title.label("title"),
+            (func.coalesce(Idea.title, "") + " " + func.coalesce(Idea.description, "")).label("document"),
+            cast(func.ts_rank(Idea.search_vector, ts_query), Float).label("rank"),
+            Idea.created_at.label("created_at"),
+        ).where(
+            Idea.search_vector.op("@@")(ts_query),
+            Idea.channel_id.in_(member_channels),
+        )
+
+        # ts_rank is float4; ranks are widened to float8 so they round-trip
+        # exactly through the cursor and keyset comparisons stay stable.
+        hits = union_all(message_hits, idea_hits).subquery("hits")
+
+        # Rank and paginate first so ts_headline only runs on the returned page
+        page_query = select(hits)
+        if cursor:
+            rank, created_at, result_id = SearchService.decode_cursor(cursor)
+            page_query = page_query.where(
+                tuple_(hits.c.rank, hits.c.created_at, hits.c.id)
+                < tuple_(rank, created_at, result_id)
+            )
+        page = (
+            page_query
+            .order_by(hits.c.rank.desc(), hits.c.created_at.desc(), hits.c.id.desc())
+            .limit(limit + 1)
+            .subquery("page")
+        )
+
+        rows = db.execute(
+            select(
+                page.c.kind,
+                page.c.id,
+                page.c.channel_id,
+                page.c.message_id,
+                page.c.title,
+                page.c.rank,
+                page.c.created_at,
+                func.ts_headline(
+                    SEARCH_CONFIG,
+                    # Markers typed into the content itself must not turn into tags
+                    func.translate(page.c.document, HIGHLIGHT_START + HIGHLIGHT_STOP, ""),
+                    ts_query,
+                    HEADLINE_OPTIONS,
+                ).label("snippet"),
+            ).order_by(page.c.rank.desc(), page.c.created_at.desc(), page.c.id.desc())
+        ).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = SearchService.encode_cursor(last.rank, last.created_at, last.id)
+
+        results = [{**row._mapping, "snippet": _render_snippet(row.snippet)} for row in rows]
+        return results, next_cursor
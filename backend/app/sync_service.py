@@ -0,0 +1,127 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, func, cast, Text, BigInteger, tuple_, or_, and_
+from .models import ChangeLog, ChannelMember
+from typing import List, Optional
+import uuid
+
+# Kinds written to the change log
+MESSAGE_CREATED = "message.created"
+MESSAGE_DELETED = "message.deleted"
+MESSAGE_PINNED = "message.pinned"
+REACTION_ADDED = "reaction.added"
+REACTION_REMOVED = "reaction.removed"
+IDEA_CREATED = "idea.created"
+MEMBER_JOINED = "member.joined"
+MEMBER_LEFT = "member.left"
+CHANNEL_DELETED = "channel.deleted"
+
+
+class SyncService:
+    """
+    Change log for /sync.
+
+    Sequence ids are handed out at INSERT but become visible at COMMIT, so a
+    plain "id > cursor" reader can skip a slow transaction's row. Instead the
+    cursor is a (txid, id) pair and only rows of transactions older than the
+    oldest one still running (the snapshot xmin) are returned; anything newer
+    is picked up by the next call.
+    """
+
+    @staticmethod
+    def record(
+        db: Session,
+        channel_id: uuid.UUID,
+        kind: str,
+        entity_id: uuid.UUID = None,
+        user_id: uuid.UUID = None,
+        payload: dict = None,
+    ) -> ChangeLog:
+        """Add a change to the caller's transaction; committed with the change itself"""
+        entry = ChangeLog(
+            channel_id=channel_id,
+            kind=kind,
+            entity_id=entity_id,
+            user_id=user_id,
+            payload=payload,
+        )
+        db.add(entry)
+        return entry
+
+    @staticmethod
+    def record_many(
+        db: Session,
+        channel_id: uuid.UUID,
+        kind: str,
+        entity_ids: List[uuid.UUID],
+        user_id: uuid.UUID = None,
+    ):
+        """record() for many entities at once: one multi-row INSERT, same transaction"""
+        if not entity_ids:
+            return
+        db.execute(insert(ChangeLog), [
+            {"channel_id": channel_id, "kind": kind, "entity_id": entity_id, "user_id": user_id}
+            for entity_id in entity_ids
+        ])
+
+    @staticmethod
+    def encode_cursor(txid: int, entry_id: int) -> str:
+        return f"{txid}-{entry_id}"
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Inverse of encode_cursor; raises ValueError on malformed input"""
+        try:
+            txid, entry_id = cursor.split("-", 1)
+            return int(txid), int(entry_id)
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+
+    @staticmethod
+    def visible_horizon(db: Session) -> int:
+        """Oldest transaction id that may still be running"""
+        return db.execute(
+            select(cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger))
+        ).scalar()
+
+    @staticmethod
+    def changes_since(db: Session, user_id: uuid.UUID, since: Optional[str], limit: int = 500):
+        """
+        Changes in the user's channels after `since`. Without a cursor only the
+        current head is returned, which clients store after a full refetch.
+        Returns (entries, next_cursor, has_more).
+        """
+        horizon = SyncService.visible_horizon(db)
+        head = SyncService.encode_cursor(horizon, 0)
+        if since is None:
+            return [], head, False
+
+        after = SyncService.decode_cursor(since)
+
+        member_channels = select(ChannelMember.channel_id).where(
+            ChannelMember.user_id == user_id
+        )
+        entries = (
+            db.query(ChangeLog)
+            .filter(
+                tuple_(ChangeLog.txid, ChangeLog.id) > tuple_(*after),
+                ChangeLog.txid < horizon,
+                or_(
+                    ChangeLog.channel_id.in_(member_channels),
+                    # Lets the user's other devices see channels they were removed from
+                    and_(ChangeLog.kind == MEMBER_LEFT, ChangeLog.entity_id == user_id),
+                ),
+            )
+            .order_by(ChangeLog.txid, ChangeLog.id)
+            .limit(limit + 1)
+            .all()
+        )
+
+        has_more = len(entries) > limit
+        if has_more:
+            entries = entries[:limit]
+            last = entries[-1]
+            return entries, SyncService.encode_cursor(last.txid, last.id), True
+
+        # Caught up: everything below the horizon has been delivered
+        next_cursor = max(after, (horizon, 0))
+        return entries, SyncService.encode_cursor(*next_cursor), False
@@ -4,6 +4,7 @@ import uuid
 import shutil
 
 from .auth import get_current_user
+from .rate_limit import rate_limit
 from .models import User
 
 router = APIRouter()
@@ -12,12 +13,10 @@ router = APIRouter()
 # This file is backend/app/upload.py
 # parent = app, parent.parent = backend
 BASE_DIR = Path(__file__).resolve().parent.parent
-UPLOAD_DIR = BASE_DIR / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-print(f"[upload.py] UPLOAD_DIR = {UPLOAD_DIR}")
+UPLOAD_DIR = BASE_DIR / "uploads"  # created by create_app()
 
 
-@router.post("/upload")
+@router.post("/upload", dependencies=[Depends(rate_limit("uploads"))])
 async def upload_file(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
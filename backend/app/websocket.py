@@ -1,67 +1,575 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict, List
+from starlette.concurrency import run_in_threadpool
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
+import asyncio
 import json
+import time
 import uuid
 
+from .config import settings
+from .database import SessionLocal
+from .auth import get_user_from_token
+from .models import Channel, ChannelMember
+from .presence import PresenceTracker
+from .receipts import ReceiptTracker, ReceiptService
+from .rate_limit import ws_limiter
+
 router = APIRouter()
 
+class Connection:
+    """
+    Registry record for one accepted socket. Slotted because a busy worker
+    holds thousands of these; hashed by identity (WebSocket itself is a
+    Mapping and can't be a dict key).
+
+    Frames are never sent directly: they go into `outbox` and the socket's
+    single writer task sends them in order. Queuing never awaits, so frames
+    queued by overlapping broadcasts keep their sequence order.
+    """
+    __slots__ = ("websocket", "user_id", "channels", "multiplexed", "last_activity", "outbox", "writer")
+
+    def __init__(self, websocket: WebSocket, user_id: uuid.UUID, multiplexed: bool = False):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.channels: Set[uuid.UUID] = set()
+        self.multiplexed = multiplexed
+        self.last_activity = time.monotonic()
+        # Text frames, or a (code, reason) tuple to close once they are sent
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.writer: Optional[asyncio.Task] = None
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[uuid.UUID, List[WebSocket]] = {}
-    
-    async def connect(self, websocket: WebSocket, channel_id: uuid.UUID):
+    def __init__(
+        self,
+        replay_buffer_size: int = 256,
+        heartbeat_interval: float = 25.0,
+        idle_timeout: float = 75.0,
+        send_timeout: float = 5.0,
+        send_queue_size: int = 1024,
+    ):
+        # Every accepted socket, keyed by id(websocket); the record keeps the
+        # socket alive so the id can't be reused while it's registered.
+        self.connections: Dict[int, Connection] = {}
+        # channel -> insertion-ordered set of records, so subscribe/unsubscribe
+        # are O(1) and broadcasts iterate a snapshot
+        self.active_connections: Dict[uuid.UUID, Dict[Connection, None]] = {}
+        # Membership is checked once when a channel is subscribed and then
+        # trusted for the connection's lifetime; revoke_membership/close_channel
+        # invalidate it via the per-user index.
+        self.user_connections: Dict[uuid.UUID, Set[Connection]] = {}
+        # Every broadcast frame gets the next per-channel sequence number and
+        # is kept in a bounded ring so reconnecting clients can resume.
+        self.sequences: Dict[uuid.UUID, int] = {}
+        self.replay_buffers: Dict[uuid.UUID, Deque[Tuple[int, str]]] = {}
+        self.replay_buffer_size = replay_buffer_size
+        # Sequence numbers only mean something within one server process
+        self.epoch = uuid.uuid4().hex
+        # Event loop serving the sockets, for calls coming from sync routes
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Heartbeats: half-open mobile connections never fail a send on their
+        # own, so sockets that stay silent past idle_timeout are reaped.
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        # A socket this many frames behind is dropped rather than buffered for
+        self.send_queue_size = send_queue_size
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.counters = {"opened": 0, "closed": 0, "reaped": 0, "send_failures": 0, "overflowed": 0}
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        channel_id: uuid.UUID,
+        user_id: uuid.UUID,
+        resume_from: Optional[int] = None,
+        epoch: Optional[str] = None,
+    ):
+        """
+        Accept the socket, greet it, replay frames after `resume_from` when the
+        ring still has them (otherwise tell the client to fall back to /sync),
+        and only then start delivering live broadcasts to it.
+        The caller must already have checked that the user is a member.
+        """
+        conn = await self._accept(websocket, user_id)
+        # Queued, not awaited: the subscription below is registered before any
+        # other task runs, so no broadcast can slip past this socket
+        self._enqueue(conn, json.dumps({
+            "type": "connected",
+            "message": "WebSocket connected successfully",
+            "channel_id": str(channel_id),
+            "seq": self.sequences.get(channel_id, 0),
+            "epoch": self.epoch,
+        }))
+        await self.subscribe(websocket, channel_id, resume_from, epoch)
+
+    async def connect_user(self, websocket: WebSocket, user_id: uuid.UUID, channel_ids: List[uuid.UUID]):
+        """Accept a multiplexed socket and subscribe it to the given channels"""
+        conn = await self._accept(websocket, user_id, multiplexed=True)
+        self._enqueue(conn, json.dumps({
+            "type": "connected",
+            "message": "WebSocket connected successfully",
+            "user_id": str(user_id),
+            "channels": {str(cid): self.sequences.get(cid, 0) for cid in channel_ids},
+            "epoch": self.epoch,
+        }))
+        for channel_id in channel_ids:
+            await self.subscribe(websocket, channel_id)
+
+    async def _accept(self, websocket: WebSocket, user_id: uuid.UUID, multiplexed: bool = False) -> Connection:
+        self.loop = asyncio.get_running_loop()
+        self.start_heartbeat()
         await websocket.accept()
-        if channel_id not in self.active_connections:
-            self.active_connections[channel_id] = []
-        self.active_connections[channel_id].append(websocket)
-    
-    def disconnect(self, websocket: WebSocket, channel_id: uuid.UUID):
-        if channel_id in self.active_connections:
+        conn = Connection(websocket, user_id, multiplexed)
+        conn.writer = self.loop.create_task(self._write_loop(conn))
+        self.connections[id(websocket)] = conn
+        self.user_connections.setdefault(user_id, set()).add(conn)
+        self.counters["opened"] += 1
+        return conn
+
+    # ---------- sending ----------
+
+    def _enqueue(self, conn: Connection, frame) -> bool:
+        """Queue a frame for the socket's writer; a socket too far behind is dropped"""
+        if conn.outbox.qsize() >= self.send_queue_size:
+            self.counters["overflowed"] += 1
+            self._drop(conn, "send queue overflow")
+            return False
+        conn.outbox.put_nowait(frame)
+        return True
+
+    async def _write_loop(self, conn: Connection):
+        """The only task that sends on this socket, so frames leave in queue order"""
+        while True:
+            frame = await conn.outbox.get()
             try:
-                self.active_connections[channel_id].remove(websocket)
-                if not self.active_connections[channel_id]:
-                    del self.active_connections[channel_id]
-            except ValueError:
-                pass
-    
+                if isinstance(frame, tuple):
+                    code, reason = frame
+                    await asyncio.wait_for(conn.websocket.close(code=code, reason=reason), self.send_timeout)
+                    return
+                await asyncio.wait_for(conn.websocket.send_text(frame), self.send_timeout)
+            except Exception as e:
+                print(f"Error sending to connection: {e}")
+                self.counters["send_failures"] += 1
+                self._drop(conn, "send failed")
+                return
+
+    def _drop(self, conn: Connection, reason: str):
+        """Unregister a socket that can't keep up and close it in the background"""
+        if self.connections.pop(id(conn.websocket), None) is None:
+            return
+        self._forget(conn)
+        self.loop.create_task(self._close_quietly(conn.websocket, reason))
+
+    async def _close_quietly(self, websocket: WebSocket, reason: str):
+        try:
+            await asyncio.wait_for(websocket.close(code=1011, reason=reason), self.send_timeout)
+        except Exception:
+            pass
+
+    def touch(self, websocket: WebSocket):
+        """Record that the client is alive (any inbound frame counts)"""
+        conn = self.connections.get(id(websocket))
+        if conn is not None:
+            conn.last_activity = time.monotonic()
+
+    async def subscribe(
+        self,
+        websocket: WebSocket,
+        channel_id: uuid.UUID,
+        resume_from: Optional[int] = None,
+        epoch: Optional[str] = None,
+    ):
+        """Start delivering a channel's broadcasts to an accepted socket"""
+        conn = self.connections.get(id(websocket))
+        if conn is None:
+            return
+        if resume_from is not None:
+            frames = self.frames_after(channel_id, resume_from) if epoch == self.epoch else None
+            if frames is None:
+                self._enqueue(conn, json.dumps({
+                    "type": "resync_required",
+                    "channel_id": str(channel_id),
+                    "seq": self.sequences.get(channel_id, 0),
+                    "epoch": self.epoch,
+                }))
+            else:
+                for _, frame in frames:
+                    if not self._enqueue(conn, frame):
+                        return
+
+        # Nothing above awaits, so no frame can fall between the replayed
+        # ones and the live ones
+        if id(websocket) not in self.connections:
+            return
+        if channel_id not in conn.channels:
+            conn.channels.add(channel_id)
+            self.active_connections.setdefault(channel_id, {})[conn] = None
+
+    def is_subscribed(self, websocket: WebSocket, channel_id: uuid.UUID) -> bool:
+        """Per-frame authorization: a set lookup, no DB"""
+        conn = self.connections.get(id(websocket))
+        return conn is not None and channel_id in conn.channels
+
+    def subscribed_channels(self, websocket: WebSocket) -> Tuple[uuid.UUID, ...]:
+        conn = self.connections.get(id(websocket))
+        return tuple(conn.channels) if conn is not None else ()
+
+    def unsubscribe(self, websocket: WebSocket, channel_id: uuid.UUID):
+        conn = self.connections.get(id(websocket))
+        if conn is not None:
+            self._unsubscribe(conn, channel_id)
+
+    def _unsubscribe(self, conn: Connection, channel_id: uuid.UUID):
+        conn.channels.discard(channel_id)
+        members = self.active_connections.get(channel_id)
+        if members is not None:
+            members.pop(conn, None)
+            if not members:
+                del self.active_connections[channel_id]
+
+    def disconnect(self, websocket: WebSocket):
+        """Forget a socket and all of its subscriptions"""
+        conn = self.connections.pop(id(websocket), None)
+        if conn is not None:
+            self._forget(conn)
+
+    def _forget(self, conn: Connection):
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+        for channel_id in tuple(conn.channels):
+            self._unsubscribe(conn, channel_id)
+        user_conns = self.user_connections.get(conn.user_id)
+        if user_conns is not None:
+            user_conns.discard(conn)
+            if not user_conns:
+                del self.user_connections[conn.user_id]
+        self.counters["closed"] += 1
+
     async def send_personal_message(self, message: str, websocket: WebSocket):
+        """Reply to one socket, in order with the broadcasts queued for it"""
+        conn = self.connections.get(id(websocket))
+        if conn is not None:
+            self._enqueue(conn, message)
+            return
         try:
             await websocket.send_text(message)
         except Exception as e:
             print(f"Error sending personal message: {e}")
-    
+
+    def frames_after(self, channel_id: uuid.UUID, resume_from: int) -> Optional[List[Tuple[int, str]]]:
+        """Buffered frames newer than `resume_from`, or None if the ring rolled over"""
+        current = self.sequences.get(channel_id, 0)
+        if resume_from > current:
+            return None
+        if resume_from == current:
+            return []
+        buffer = self.replay_buffers.get(channel_id)
+        if not buffer or buffer[0][0] > resume_from + 1:
+            return None
+        return [(seq, frame) for seq, frame in buffer if seq > resume_from]
+
     async def broadcast_to_channel(self, message: dict, channel_id: uuid.UUID, exclude: WebSocket = None):
         """
         Broadcast message to all connections in a channel
         exclude: Don't send to this connection (usually the sender)
+        Only queues frames; never awaits, so sequence numbers reach every
+        socket in order even when broadcasts overlap.
         """
-        if channel_id not in self.active_connections:
+        seq = self.sequences.get(channel_id, 0) + 1
+        self.sequences[channel_id] = seq
+
+        message_json = json.dumps(
+            {**message, "channel_id": str(channel_id), "seq": seq}, default=str
+        )
+
+        buffer = self.replay_buffers.get(channel_id)
+        if buffer is None:
+            buffer = self.replay_buffers[channel_id] = deque(maxlen=self.replay_buffer_size)
+        buffer.append((seq, message_json))
+
+        members = self.active_connections.get(channel_id)
+        if not members:
             return
-        
-        message_json = json.dumps(message, default=str)
-        disconnected = []
-        
-        for connection in self.active_connections[channel_id]:
-            # Skip the sender if exclude is specified
-            if exclude and connection == exclude:
+
+        # Snapshot: an overflowing socket is dropped from `members` mid-loop
+        for conn in tuple(members):
+            # The sender only gets a bare ack so its sequence has no gaps
+            if conn.websocket is exclude:
+                self._enqueue(conn, json.dumps(
+                    {"type": "ack", "channel_id": str(channel_id), "seq": seq}
+                ))
+            else:
+                self._enqueue(conn, message_json)
+
+    async def broadcast_ephemeral(self, message_json: str, channel_id: uuid.UUID):
+        """
+        Send a frame that isn't part of the channel history (typing, presence):
+        no sequence number, not kept for replay.
+        """
+        for conn in tuple(self.active_connections.get(channel_id, ())):
+            self._enqueue(conn, message_json)
+
+    async def revoke_membership(self, channel_id: uuid.UUID, user_id: uuid.UUID):
+        """Drop a user's sockets from a channel, e.g. after leave_channel"""
+        conns = [
+            conn for conn in self.user_connections.get(user_id, ())
+            if channel_id in conn.channels
+        ]
+        await self._evict(conns, channel_id, "membership_revoked")
+
+    async def close_channel(self, channel_id: uuid.UUID):
+        """Drop every socket from a channel that is being deleted"""
+        await self._evict(tuple(self.active_connections.get(channel_id, ())), channel_id, "channel_deleted")
+        self.sequences.pop(channel_id, None)
+        self.replay_buffers.pop(channel_id, None)
+
+    async def _evict(self, conns, channel_id: uuid.UUID, reason: str):
+        for conn in conns:
+            self._unsubscribe(conn, channel_id)
+            if not self._enqueue(conn, json.dumps({
+                "type": "unsubscribed",
+                "channel_id": str(channel_id),
+                "reason": reason,
+            })):
                 continue
-                
+            # Single-channel sockets have nothing left to do; closed after the notice
+            if not conn.multiplexed:
+                self._enqueue(conn, (1008, reason))
+
+    # ---------- heartbeats ----------
+
+    def start_heartbeat(self):
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat_loop())
+
+    async def stop_heartbeat(self):
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
             try:
-                await connection.send_text(message_json)
+                await self.heartbeat()
             except Exception as e:
-                print(f"Error broadcasting to connection: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected connections
-        for conn in disconnected:
-            self.disconnect(conn, channel_id)
+                print(f"[WS_HEARTBEAT_ERROR] {e}")
+
+    async def heartbeat(self):
+        """
+        Reap sockets idle past the timeout and queue a ping for the rest;
+        a ping that can't be sent within send_timeout drops its socket.
+        """
+        now = time.monotonic()
+        idle = [conn for conn in self.connections.values() if now - conn.last_activity > self.idle_timeout]
+        for conn in idle:
+            await self._reap(conn, "idle timeout")
+
+        ping = json.dumps({"type": "ping", "ts": time.time()})
+        for conn in tuple(self.connections.values()):
+            self._enqueue(conn, ping)
+
+    async def _reap(self, conn: Connection, reason: str):
+        if self.connections.pop(id(conn.websocket), None) is None:
+            return
+        self._forget(conn)
+        self.counters["reaped"] += 1
+        try:
+            await asyncio.wait_for(conn.websocket.close(code=1001, reason=reason), self.send_timeout)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.connections),
+            "multiplexed_connections": sum(1 for conn in self.connections.values() if conn.multiplexed),
+            "users": len(self.user_connections),
+            "channels": len(self.active_connections),
+            "subscriptions": sum(len(members) for members in self.active_connections.values()),
+            **self.counters,
+        }
+
+    def notify_threadsafe(self, coroutine_function, *args):
+        """
+        Fire-and-forget a manager coroutine from sync code running in the
+        threadpool (e.g. routes.py). Only reaches sockets of this process.
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(coroutine_function(*args), loop)
+
+manager = ConnectionManager(
+    replay_buffer_size=settings.WS_REPLAY_BUFFER_SIZE,
+    heartbeat_interval=settings.WS_HEARTBEAT_INTERVAL_SECONDS,
+    idle_timeout=settings.WS_IDLE_TIMEOUT_SECONDS,
+    send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+    send_queue_size=settings.WS_SEND_QUEUE_SIZE,
+)
+
+presence = PresenceTracker(
+    manager,
+    flush_interval=settings.PRESENCE_FLUSH_INTERVAL_SECONDS,
+    typing_min_interval=settings.TYPING_MIN_INTERVAL_SECONDS,
+    typing_ttl=settings.TYPING_TTL_SECONDS,
+    last_seen_flush_interval=settings.LAST_SEEN_FLUSH_INTERVAL_SECONDS,
+)
+
+receipts = ReceiptTracker(manager, flush_interval=settings.RECEIPT_FLUSH_INTERVAL_SECONDS)
+
+
+@router.get("/stats")
+def websocket_stats():
+    """Connection counts and open/close/reap counters for this worker."""
+    return {**manager.stats(), "presence": presence.stats(), "receipts": receipts.stats()}
+
+
+# ============ AUTH HELPERS (run in the threadpool) ============
+
+
+def _load_user(token: str) -> Optional[uuid.UUID]:
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+        return user.id if user else None
+    finally:
+        db.close()
+
+
+def _load_user_channels(token: str):
+    """(user_id, member channel ids) for a valid token, else None"""
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+        if not user:
+            return None
+        channel_ids = [
+            channel_id for (channel_id,) in db.query(ChannelMember.channel_id)
+            .join(Channel, Channel.id == ChannelMember.channel_id)
+            .filter(ChannelMember.user_id == user.id, Channel.deleted_at.is_(None))
+        ]
+        return user.id, channel_ids
+    finally:
+        db.close()
+
+
+def _is_channel_member(user_id: uuid.UUID, channel_id: uuid.UUID) -> bool:
+    db = SessionLocal()
+    try:
+        return db.query(ChannelMember.id).join(
+            Channel, Channel.id == ChannelMember.channel_id
+        ).filter(
+            ChannelMember.user_id == user_id,
+            ChannelMember.channel_id == channel_id,
+            Channel.deleted_at.is_(None),
+        ).first() is not None
+    finally:
+        db.close()
+
+
+def _is_heartbeat(message_data: dict) -> bool:
+    return message_data.get("type") in ("ping", "pong")
+
+
+async def _answer_heartbeat(websocket: WebSocket, message_data: dict):
+    # Pongs only refresh last_activity (already done); client pings get a pong
+    if message_data.get("type") == "ping":
+        await manager.send_personal_message(json.dumps({"type": "pong"}), websocket)
+
+
+def _is_typing(message_data: dict) -> bool:
+    return message_data.get("type") == "typing"
+
+
+def _is_receipt(message_data: dict) -> bool:
+    return message_data.get("type") == "receipt"
+
+
+# Frame types clients may relay to a channel. Every other type (resync_required,
+# reaction, receipts, presence, messages, ...) is only ever sent by the server.
+RELAYED_FRAME_TYPES = {"message"}
+
+
+async def _admit_relay(websocket: WebSocket, message_data: dict) -> bool:
+    """Reject frames that would pass for server frames once broadcast"""
+    if message_data.get("type") in RELAYED_FRAME_TYPES:
+        return True
+    await manager.send_personal_message(json.dumps({
+        "error": "Unsupported frame type",
+        "frame_type": str(message_data.get("type")),
+    }), websocket)
+    return False
+
+
+def _take_receipt(channel_id: uuid.UUID, user_id: uuid.UUID, message_data: dict):
+    """{"type": "receipt", "status": "delivered"|"read", "up_to": <created_at of newest message>}"""
+    at = ReceiptService.parse_timestamp(message_data.get("up_to"))
+    if at is not None:
+        receipts.ack(channel_id, user_id, message_data.get("status"), at)
+
+
+async def _announce_online(websocket: WebSocket, user_id: uuid.UUID, first_socket: bool):
+    """Presence bookkeeping right after a socket went live"""
+    presence.start()
+    receipts.start()
+    channels = manager.subscribed_channels(websocket)
+    if first_socket:
+        presence.user_connected(user_id, channels)
+    else:
+        presence.seen(user_id)
+    await presence.send_snapshot(websocket, channels)
+
+
+def _announce_offline(websocket: WebSocket, user_id: uuid.UUID):
+    """Disconnect the socket; the user goes offline with their last one"""
+    channels = manager.subscribed_channels(websocket)
+    manager.disconnect(websocket)
+    if user_id is None:
+        return
+    if manager.user_connections.get(user_id):
+        presence.seen(user_id)
+    else:
+        presence.user_disconnected(user_id, channels)
+
+
+async def _admit_frame(websocket: WebSocket, user_id: uuid.UUID) -> bool:
+    """Per-user budget for frames that get broadcast; over it the frame is dropped"""
+    allowed, retry_after = ws_limiter.check("ws_frames", str(user_id))
+    if not allowed:
+        await manager.send_personal_message(json.dumps({
+            "error": "Rate limited",
+            "retry_after": round(retry_after, 2),
+        }), websocket)
+    return allowed
+
+
+def _parse_channel_id(value) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+# ============ SINGLE-CHANNEL SOCKET ============
 
-manager = ConnectionManager()
 
 @router.websocket("/channel/{channel_id}")
-async def websocket_endpoint(websocket: WebSocket, channel_id: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    channel_id: str,
+    token: Optional[str] = None,
+    resume_from: Optional[int] = None,
+    epoch: Optional[str] = None,
+):
     print(f"🔵 WebSocket connection attempt for channel: {channel_id}")
-    
+
     try:
         # Validate channel_id is a valid UUID
         channel_uuid = uuid.UUID(channel_id)
@@ -70,44 +578,74 @@ async def websocket_endpoint(websocket: WebSocket, channel_id: str):
         print(f"❌ Invalid channel ID: {channel_id}, error: {e}")
         await websocket.close(code=1008, reason="Invalid channel ID")
         return
-    
-    await manager.connect(websocket, channel_uuid)
-    print(f"✅ WebSocket connected for channel: {channel_uuid}")
-    
+
+    # Authenticate and authorize once at handshake; frames are not re-checked
+    user_id = await run_in_threadpool(_load_user, token) if token else None
+    if not user_id:
+        await websocket.close(code=1008, reason="Invalid token")
+        return
+    if not await run_in_threadpool(_is_channel_member, user_id, channel_uuid):
+        await websocket.close(code=1008, reason="Not a member of this channel")
+        return
+
     try:
-        # Send welcome message
-        await websocket.send_text(json.dumps({
-            "type": "connected",
-            "message": "WebSocket connected successfully",
-            "channel_id": str(channel_uuid)
-        }))
-        print(f"📤 Welcome message sent")
-        
+        # Sends the welcome frame and replays missed frames before going live
+        first_socket = not manager.user_connections.get(user_id)
+        await manager.connect(websocket, channel_uuid, user_id, resume_from=resume_from, epoch=epoch)
+        await _announce_online(websocket, user_id, first_socket)
+        print(f"✅ WebSocket connected for channel: {channel_uuid}")
+
         while True:
             try:
                 data = await websocket.receive_text()
-                print(f"📩 Received data: {data}")
-                
+
+                manager.touch(websocket)
+                presence.seen(user_id)
+
                 # Parse JSON message
                 try:
                     message_data = json.loads(data)
-                    print(f"✅ Valid JSON received: {message_data.get('type')}")
-                    
+
+                    if _is_heartbeat(message_data):
+                        await _answer_heartbeat(websocket, message_data)
+                        continue
+
+                    # Revoked by leave_channel/delete_channel while connected
+                    if not manager.is_subscribed(websocket, channel_uuid):
+                        break
+
+                    # Coalesced into the next presence frame, never broadcast directly
+                    if _is_typing(message_data):
+                        presence.typing(channel_uuid, user_id, message_data.get("typing", True) is not False)
+                        continue
+                    if _is_receipt(message_data):
+                        _take_receipt(channel_uuid, user_id, message_data)
+                        continue
+
+                    if not await _admit_relay(websocket, message_data):
+                        continue
+                    if not await _admit_frame(websocket, user_id):
+                        continue
+
+                    # Senders can't impersonate each other
+                    message_data["sender_id"] = str(user_id)
+                    presence.typing(channel_uuid, user_id, False)
+
                     # Broadcast to all OTHER users (exclude sender)
                     # This prevents the sender from seeing duplicate messages
                     await manager.broadcast_to_channel(
-                        message_data, 
+                        message_data,
                         channel_uuid,
                         exclude=websocket  # ✅ CRITICAL: Don't send back to sender
                     )
-                    
+
                 except json.JSONDecodeError as e:
                     print(f"⚠️ Invalid JSON: {e}")
-                    await websocket.send_text(json.dumps({
-                        "error": "Invalid JSON", 
+                    await manager.send_personal_message(json.dumps({
+                        "error": "Invalid JSON",
                         "received": data
-                    }))
-                    
+                    }), websocket)
+
             except WebSocketDisconnect:
                 print(f"🔴 WebSocket disconnected normally")
                 break
@@ -116,7 +654,7 @@ async def websocket_endpoint(websocket: WebSocket, channel_id: str):
                 import traceback
                 traceback.print_exc()
                 break
-                
+
     except WebSocketDisconnect:
         print(f"🔴 WebSocket disconnected for channel: {channel_uuid}")
     except Exception as e:
@@ -124,5 +662,97 @@ async def websocket_endpoint(websocket: WebSocket, channel_id: str):
         import traceback
         traceback.print_exc()
     finally:
-        manager.disconnect(websocket, channel_uuid)
-        print(f"🧹 Cleaned up connection for channel: {channel_uuid}")
\ No newline at end of file
+        _announce_offline(websocket, user_id)
+        print(f"🧹 Cleaned up connection for channel: {channel_uuid}")
+
+
+# ============ MULTIPLEXED USER SOCKET ============
+
+
+@router.websocket("/user")
+async def user_websocket_endpoint(websocket: WebSocket, token: str, subscribe_all: bool = True):
+    """
+    One socket per user for all channels.
+    Client frames:
+      {"type": "subscribe", "channel_id": ..., "resume_from": n, "epoch": ...}
+      {"type": "unsubscribe", "channel_id": ...}
+      {"type": "message", "channel_id": ..., ...} is broadcast to that channel
+    Every server frame carries its channel_id and per-channel seq.
+    """
+    auth = await run_in_threadpool(_load_user_channels, token)
+    if not auth:
+        await websocket.close(code=1008, reason="Invalid token")
+        return
+    user_id, channel_ids = auth
+
+    try:
+        first_socket = not manager.user_connections.get(user_id)
+        await manager.connect_user(websocket, user_id, channel_ids if subscribe_all else [])
+        await _announce_online(websocket, user_id, first_socket)
+        print(f"✅ User WebSocket connected: {user_id} ({len(channel_ids)} channels)")
+
+        while True:
+            data = await websocket.receive_text()
+            manager.touch(websocket)
+            presence.seen(user_id)
+            try:
+                message_data = json.loads(data)
+            except json.JSONDecodeError:
+                await manager.send_personal_message(json.dumps({"error": "Invalid JSON"}), websocket)
+                continue
+
+            if _is_heartbeat(message_data):
+                await _answer_heartbeat(websocket, message_data)
+                continue
+
+            frame_type = message_data.get("type")
+            channel_id = _parse_channel_id(message_data.get("channel_id"))
+            if channel_id is None:
+                await manager.send_personal_message(json.dumps({"error": "channel_id is required"}), websocket)
+                continue
+
+            if frame_type == "subscribe":
+                if not manager.is_subscribed(websocket, channel_id):
+                    if not await run_in_threadpool(_is_channel_member, user_id, channel_id):
+                        await manager.send_personal_message(json.dumps({
+                            "error": "Not a member of this channel",
+                            "channel_id": str(channel_id),
+                        }), websocket)
+                        continue
+                resume_from = message_data.get("resume_from")
+                await manager.subscribe(
+                    websocket, channel_id,
+                    resume_from=resume_from if isinstance(resume_from, int) else None,
+                    epoch=message_data.get("epoch"),
+                )
+                await manager.send_personal_message(json.dumps({
+                    "type": "subscribed",
+                    "channel_id": str(channel_id),
+                    "seq": manager.sequences.get(channel_id, 0),
+                }), websocket)
+            elif frame_type == "unsubscribe":
+                manager.unsubscribe(websocket, channel_id)
+            elif _is_typing(message_data) and manager.is_subscribed(websocket, channel_id):
+                presence.typing(channel_id, user_id, message_data.get("typing", True) is not False)
+            elif _is_receipt(message_data) and manager.is_subscribed(websocket, channel_id):
+                _take_receipt(channel_id, user_id, message_data)
+            elif manager.is_subscribed(websocket, channel_id):
+                if not await _admit_relay(websocket, message_data):
+                    continue
+                if not await _admit_frame(websocket, user_id):
+                    continue
+                message_data["sender_id"] = str(user_id)
+                presence.typing(channel_id, user_id, False)
+                await manager.broadcast_to_channel(message_data, channel_id, exclude=websocket)
+            else:
+                await manager.send_personal_message(json.dumps({
+                    "error": "Not subscribed to this channel",
+                    "channel_id": str(channel_id),
+                }), websocket)
+
+    except WebSocketDisconnect:
+        print(f"🔴 User WebSocket disconnected: {user_id}")
+    except Exception as e:
+        print(f"💥 User WebSocket error for {user_id}: {e}")
+    finally:
+        _announce_offline(websocket, user_id)
@@ -0,0 +1,394 @@
+"""
+Synthetic data generator for large workspaces.
+
+Bulk-loads users, workspaces, channels, memberships, messages (with replies
+and attachments), ideas and calendar events straight into Postgres with
+COPY, using the table definitions from app/models.py. Activity is skewed
+the way real workspaces are: channel sizes and traffic follow a Zipf
+distribution (a few hot channels, a long tail), and within a channel a few
+chatty members write most of the messages.
+
+Run from backend/ against a migrated database (alembic upgrade head):
+
+    python -m benchmarks.generate_data --users 5000 --messages 10000000 --ideas 100000
+
+Everything generated can share one password (--password) so the load test
+can log in as any of the users. Re-running adds another data set.
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import random
+import sys
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+
+from app.config import settings
+from app.auth import get_password_hash
+from app.models import (
+    User,
+    Workspace,
+    Channel,
+    ChannelMember,
+    Message,
+    Idea,
+    CalendarEvent,
+)
+from app.upload import UPLOAD_DIR
+
+WORDS = (
+    "launch plan draft review campaign budget design feedback blog post video social "
+    "deadline client meeting sprint release copy banner newsletter event invite report "
+    "metrics growth idea asset brief roadmap update schedule approve publish today tomorrow "
+    "week quarter team sync launch landing page email thread ship fix test"
+).split()
+ATTACHMENTS = [
+    ("image/png", ".png"),
+    ("image/jpeg", ".jpg"),
+    ("application/pdf", ".pdf"),
+    ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", ".docx"),
+    ("text/plain", ".txt"),
+]
+CATEGORIES = ["blog", "social", "campaign", "event", "other"]
+STATUSES = ["idea", "in_progress", "review", "published"]
+PRIORITIES = ["low", "medium", "high"]
+
+
+class CopyLoader:
+    """
+    Streams rows for one table into COPY ... FROM STDIN in chunks. Columns are
+    checked against the model so generated (Computed) columns and typos fail
+    before anything is sent.
+    """
+
+    def __init__(self, cursor, model, columns: List[str], chunk_rows: int):
+        table = model.__table__
+        for name in columns:
+            column = table.c.get(name)
+            if column is None:
+                raise ValueError(f"{table.name} has no column {name}")
+            if column.computed is not None:
+                raise ValueError(f"{table.name}.{name} is generated by Postgres")
+        self.cursor = cursor
+        self.statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        self.table = table.name
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._pending = 0
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def add(self, *values):
+        # None becomes an unquoted empty field, which COPY reads as NULL
+        self._writer.writerow([_copy_value(value) for value in values])
+        self._pending += 1
+        if self._pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._buffer.seek(0)
+        self.cursor.copy_expert(self.statement, self._buffer)
+        self.rows += self._pending
+        self._pending = 0
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+class Zipf:
+    """Weighted picks where item i has weight 1 / (i + 1) ** s"""
+
+    def __init__(self, items: list, s: float, rng: random.Random):
+        self.items = items
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1.0 / (i + 1) ** s for i in range(len(items))))
+
+    def pick(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return self.items[bisect_left(self.cumulative, point)]
+
+
+def _sentence(rng: random.Random, low: int = 3, high: int = 25) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def _progress(label: str, done: int, total: int, started: float):
+    rate = done / max(time.perf_counter() - started, 1e-9)
+    print(f"\r  {label}: {done:,}/{total:,} ({rate:,.0f} rows/s)", end="", file=sys.stderr, flush=True)
+
+
+def generate(args):
+    rng = random.Random(args.seed)
+    engine = create_engine(args.database_url)
+    now = datetime.utcnow()
+    history_start = now - timedelta(days=args.days)
+    run_tag = uuid.uuid4().hex[:6]
+    password_hash = get_password_hash(args.password)
+
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+    started = time.perf_counter()
+
+    def loader(model, columns):
+        return CopyLoader(cursor, model, columns, args.chunk_rows)
+
+    def finish(*loaders):
+        for each in loaders:
+            each.flush()
+        raw.commit()
+        for each in loaders:
+            print(f"  {each.table}: {each.rows:,} rows", file=sys.stderr)
+
+    try:
+        # ---------- workspaces, users ----------
+        workspaces = [uuid.uuid4() for _ in range(args.workspaces)]
+        workspace_rows = loader(Workspace, ["id", "name", "created_at"])
+        for i, workspace_id in enumerate(workspaces):
+            workspace_rows.add(workspace_id, f"Workspace {run_tag}-{i}", history_start)
+
+        users = [uuid.uuid4() for _ in range(args.users)]
+        users_by_workspace: Dict[uuid.UUID, List[uuid.UUID]] = {w: [] for w in workspaces}
+        user_rows = loader(User, ["id", "email", "password_hash", "name", "workspace_id", "last_seen", "created_at"])
+        for i, user_id in enumerate(users):
+            workspace_id = workspaces[i % len(workspaces)]
+            users_by_workspace[workspace_id].append(user_id)
+            user_rows.add(
+                user_id, f"user{i}-{run_tag}@example.com", password_hash, f"User {i}",
+                workspace_id, now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)), history_start,
+            )
+        finish(workspace_rows, user_rows)
+
+        # ---------- channels, memberships ----------
+        # Channel rank decides both size and traffic: rank 0 is the busiest
+        channels = []  # (channel_id, workspace_id, members ordered by chattiness)
+        channel_rank = {}
+        channel_rows = loader(Channel, [
+            "id", "workspace_id", "name", "description", "is_public", "created_by",
+            "member_count", "created_at",
+        ])
+        member_rows = loader(ChannelMember, ["id", "channel_id", "user_id", "role", "joined_at"])
+        for workspace_id in workspaces:
+            workspace_users = users_by_workspace[workspace_id]
+            if not workspace_users:
+                continue
+            for rank in range(args.channels_per_workspace):
+                size = int(args.max_channel_members / (rank + 1) ** args.channel_skew)
+                size = max(min(args.min_channel_members, len(workspace_users)), min(size, len(workspace_users)))
+                members = rng.sample(workspace_users, size)
+                channel_id = uuid.uuid4()
+                channels.append((channel_id, workspace_id, members))
+                channel_rank[channel_id] = rank
+                channel_rows.add(
+                    channel_id, workspace_id, f"channel-{run_tag}-{rank}", _sentence(rng, 4, 10),
+                    rng.random() < args.public_ratio, members[0], len(members), history_start,
+                )
+                for position, user_id in enumerate(members):
+                    member_rows.add(
+                        uuid.uuid4(), channel_id, user_id, "admin" if position == 0 else "member",
+                        history_start,
+                    )
+        finish(channel_rows, member_rows)
+        # Busiest channels of every workspace first
+        channels.sort(key=lambda channel: channel_rank[channel[0]])
+
+        # ---------- messages ----------
+        channel_picker = Zipf(channels, args.channel_skew, rng)
+        author_pickers = {
+            channel_id: Zipf(members, args.user_skew, rng) for channel_id, _, members in channels
+        }
+        recent = {channel_id: deque(maxlen=50) for channel_id, _, _ in channels}
+        # Reservoir of messages ideas can point back to
+        idea_sources: List[tuple] = []
+        reservoir_size = max(args.ideas, 1)
+
+        message_rows = loader(Message, [
+            "id", "channel_id", "user_id", "content", "parent_message_id", "status_tag",
+            "is_pinned", "delivery_status", "ai_processed", "file_url", "file_type", "file_name",
+            "created_at", "updated_at",
+        ])
+        step = (now - history_start) / max(args.messages, 1)
+        files_written = 0
+        load_started = time.perf_counter()
+        for i in range(args.messages):
+            channel_id, workspace_id, _ = channel_picker.pick()
+            author = author_pickers[channel_id].pick()
+            # Monotonic timestamps, so replies always come after their parent
+            created_at = history_start + step * i
+
+            parent_id = None
+            if recent[channel_id] and rng.random() < args.reply_ratio:
+                parent_id = rng.choice(recent[channel_id])
+
+            file_url = file_type = file_name = None
+            content = _sentence(rng)
+            if rng.random() < args.attachment_ratio:
+                file_type, ext = rng.choice(ATTACHMENTS)
+                stored_name = f"{uuid.uuid4()}{ext}"
+                file_url = f"/uploads/{stored_name}"
+                file_name = f"{rng.choice(WORDS)}-{i}{ext}"
+                content = f"📎 {file_name}"
+                if files_written < args.attachment_files:
+                    (UPLOAD_DIR / stored_name).write_bytes(rng.randbytes(args.attachment_bytes))
+                    files_written += 1
+
+            message_id = uuid.uuid4()
+            message_rows.add(
+                message_id, channel_id, author, content, parent_id,
+                rng.choice(STATUSES) if rng.random() < 0.02 else None,
+                rng.random() < 0.001, "sent", False, file_url, file_type, file_name,
+                created_at, created_at,
+            )
+            recent[channel_id].append(message_id)
+
+            source = (message_id, channel_id, workspace_id, author, created_at)
+            if len(idea_sources) < reservoir_size:
+                idea_sources.append(source)
+            else:
+                slot = rng.randrange(i + 1)
+                if slot < reservoir_size:
+                    idea_sources[slot] = source
+
+            if i % args.chunk_rows == 0:
+                _progress("messages", i, args.messages, load_started)
+        print(file=sys.stderr)
+        finish(message_rows)
+
+        # ---------- ideas, calendar events ----------
+        idea_rows = loader(Idea, [
+            "id", "message_id", "channel_id", "workspace_id", "user_id", "title", "description", "category",
+            "status", "priority", "deadline", "ai_score", "ai_tags", "created_at", "updated_at",
+        ])
+        event_rows = loader(CalendarEvent, [
+            "id", "workspace_id", "idea_id", "title", "description", "start_time", "end_time",
+            "reminder_sent", "created_at",
+        ])
+        for i in range(args.ideas if idea_sources else 0):
+            message_id, channel_id, workspace_id, author, created_at = idea_sources[i % len(idea_sources)]
+            if i >= len(idea_sources):
+                message_id = None  # more ideas than messages: the rest are standalone
+            idea_id = uuid.uuid4()
+            title = _sentence(rng, 3, 8)
+            deadline = None
+            if rng.random() < args.deadline_ratio:
+                deadline = created_at + timedelta(days=rng.randint(1, 60))
+            category = rng.choice(CATEGORIES)
+            idea_rows.add(
+                idea_id, message_id, channel_id, workspace_id, author, title, _sentence(rng, 10, 40), category,
+                rng.choice(STATUSES), rng.choice(PRIORITIES), deadline, rng.randint(1, 10),
+                rng.sample(WORDS, 3), created_at, created_at,
+            )
+            if deadline:
+                event_rows.add(
+                    uuid.uuid4(), workspace_id, idea_id, title, None, deadline,
+                    deadline + timedelta(hours=1), deadline < now, created_at,
+                )
+        finish(idea_rows, event_rows)
+
+        # ---------- derived columns ----------
+        channel_ids = [channel_id for channel_id, _, _ in channels]
+        cursor.execute(
+            """
+            UPDATE channels c
+            SET last_message_at = latest.at
+            FROM (
+                SELECT channel_id, max(created_at) AS at
+                FROM messages
+                WHERE channel_id = ANY(%s::uuid[])
+                GROUP BY channel_id
+            ) latest
+            WHERE c.id = latest.channel_id
+            """,
+            ([str(channel_id) for channel_id in channel_ids],),
+        )
+        # Everyone has read everything, except a few stragglers per channel
+        # whose badges then cover the whole history
+        cursor.execute(
+            "UPDATE channel_members SET last_read_message_at = %s, last_delivered_at = %s "
+            "WHERE channel_id = ANY(%s::uuid[]) AND random() > %s",
+            (now, now, [str(channel_id) for channel_id in channel_ids], args.unread_ratio),
+        )
+        cursor.execute(
+            """
+            UPDATE channel_members m
+            SET unread_count = counts.n
+            FROM (
+                SELECT channel_id, count(*) AS n
+                FROM messages
+                WHERE channel_id = ANY(%s::uuid[])
+                GROUP BY channel_id
+            ) counts
+            WHERE m.channel_id = counts.channel_id AND m.last_read_message_at IS NULL
+            """,
+            ([str(channel_id) for channel_id in channel_ids],),
+        )
+        raw.commit()
+
+        if args.analyze:
+            raw.set_isolation_level(0)  # ANALYZE can't run inside a transaction block
+            for model in (User, Channel, ChannelMember, Message, Idea, CalendarEvent):
+                cursor.execute(f"ANALYZE {model.__tablename__}")
+
+        print(
+            f"Done in {time.perf_counter() - started:,.1f}s. Workspace ids: "
+            + ", ".join(str(w) for w in workspaces),
+            file=sys.stderr,
+        )
+        if channels:
+            print(f"Hottest channel: {channels[0][0]} ({len(channels[0][2])} members)", file=sys.stderr)
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        cursor.close()
+        raw.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic TeamChat dataset with COPY")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--workspaces", type=int, default=1)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--channels-per-workspace", type=int, default=50)
+    parser.add_argument("--max-channel-members", type=int, default=1000, help="size of the largest channel")
+    parser.add_argument("--min-channel-members", type=int, default=3)
+    parser.add_argument("--public-ratio", type=float, default=0.8)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--reply-ratio", type=float, default=0.05)
+    parser.add_argument("--attachment-ratio", type=float, default=0.03)
+    parser.add_argument("--attachment-files", type=int, default=0,
+                        help="write this many attachment blobs to the upload dir (the rest 404)")
+    parser.add_argument("--attachment-bytes", type=int, default=1024)
+    parser.add_argument("--ideas", type=int, default=10_000)
+    parser.add_argument("--deadline-ratio", type=float, default=0.3, help="ideas with a deadline get a calendar event")
+    parser.add_argument("--unread-ratio", type=float, default=0.1, help="members left with unread history")
+    parser.add_argument("--channel-skew", type=float, default=1.1, help="Zipf exponent for channel size and traffic")
+    parser.add_argument("--user-skew", type=float, default=1.2, help="Zipf exponent for authors within a channel")
+    parser.add_argument("--days", type=int, default=365, help="history span")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--no-analyze", dest="analyze", action="store_false")
+    parser.add_argument("--seed", type=int, default=1)
+    generate(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""
+Load test for the REST and WebSocket hot paths.
+
+Seeds its own users, workspace, channels and messages through the API, then
+drives each scenario at the given concurrency for a fixed duration and
+writes p50/p95/p99 latency and throughput as JSON. Results carry the git
+commit so two runs can be compared:
+
+    python -m benchmarks.loadtest run --duration 30 --concurrency 32 -o before.json
+    python -m benchmarks.loadtest run --duration 30 --concurrency 32 -o after.json
+    python -m benchmarks.loadtest compare before.json after.json
+
+Run from backend/ against a server started with uvicorn and a local
+Postgres. For deep-scrollback numbers, bulk-load data first and point the
+run at an existing channel with --channel-id/--workspace-id.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+SCENARIOS = [
+    "login",
+    "list_channels",
+    "list_messages",
+    "create_message",
+    "upload",
+    "download",
+    "ws_fanout",
+]
+PASSWORD = "loadtest-password"
+
+
+# ============ STATS ============
+
+
+class Recorder:
+    """Latencies (seconds) and error count for one scenario"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def add(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        ordered = sorted(self.latencies)
+        return {
+            "requests": len(ordered),
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else None,
+            "p50_ms": _percentile(ordered, 50),
+            "p95_ms": _percentile(ordered, 95),
+            "p99_ms": _percentile(ordered, 99),
+            "max_ms": round(ordered[-1] * 1000, 3) if ordered else None,
+        }
+
+
+def _percentile(ordered: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile in milliseconds"""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return round(ordered[rank - 1] * 1000, 3)
+
+
+def _git_commit() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except Exception:
+            return None
+
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+
+
+# ============ FIXTURES ============
+
+
+class Fixtures:
+    def __init__(self):
+        self.users: List[dict] = []  # {"email", "token", "id"}
+        self.workspace_id: Optional[str] = None
+        self.channel_ids: List[str] = []
+        self.stored_names: List[str] = []
+
+
+async def _register_and_login(client: httpx.AsyncClient, email: str, name: str) -> dict:
+    response = await client.post("/api/v1/auth/register", json={"email": email, "password": PASSWORD, "name": name})
+    if response.status_code not in (200, 400):  # 400: already registered
+        response.raise_for_status()
+    response = await client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    me = await client.get("/api/v1/auth/me", headers=_auth(token))
+    me.raise_for_status()
+    return {"email": email, "token": token, "id": me.json()["id"]}
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def seed(client: httpx.AsyncClient, args) -> Fixtures:
+    fixtures = Fixtures()
+    run_id = uuid.uuid4().hex[:8]
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def register(i: int):
+        async with limit:
+            return await _register_and_login(client, f"loadtest-{run_id}-{i}@example.com", f"Load Test {i}")
+
+    fixtures.users = list(await asyncio.gather(*(register(i) for i in range(args.users))))
+    owner = fixtures.users[0]
+
+    if args.workspace_id and args.channel_id:
+        fixtures.workspace_id = args.workspace_id
+        fixtures.channel_ids = [args.channel_id]
+    else:
+        response = await client.post(
+            "/api/v1/workspaces", json={"name": f"loadtest-{run_id}"}, headers=_auth(owner["token"])
+        )
+        response.raise_for_status()
+        fixtures.workspace_id = response.json()["id"]
+        for i in range(args.channels):
+            response = await client.post(
+                f"/api/v1/workspaces/{fixtures.workspace_id}/channels",
+                json={"name": f"loadtest-{run_id}-{i}", "is_public": True},
+                headers=_auth(owner["token"]),
+            )
+            response.raise_for_status()
+            fixtures.channel_ids.append(response.json()["id"])
+
+    async def join(user: dict, channel_id: str):
+        async with limit:
+            await client.post(f"/api/v1/channels/{channel_id}/join", headers=_auth(user["token"]))
+
+    await asyncio.gather(*(
+        join(user, channel_id) for user in fixtures.users[1:] for channel_id in fixtures.channel_ids
+    ))
+
+    async def post(i: int):
+        async with limit:
+            user = fixtures.users[i % len(fixtures.users)]
+            await client.post(
+                f"/api/v1/channels/{fixtures.channel_ids[i % len(fixtures.channel_ids)]}/messages",
+                json={"content": f"seed message {i}", "type": "text"},
+                headers=_auth(user["token"]),
+            )
+
+    await asyncio.gather(*(post(i) for i in range(args.seed_messages)))
+
+    payload = os.urandom(args.upload_bytes)
+    for _ in range(min(args.users, 16)):
+        response = await client.post(
+            "/api/upload",
+            files={"file": ("seed.bin", payload, "application/octet-stream")},
+            headers=_auth(owner["token"]),
+        )
+        response.raise_for_status()
+        fixtures.stored_names.append(response.json()["file_url"].rsplit("/", 1)[-1])
+
+    return fixtures
+
+
+# ============ REST SCENARIOS ============
+
+
+async def _drive(name: str, operation, args) -> dict:
+    """Run `operation(worker_index)` from `concurrency` workers for `duration` seconds"""
+    recorder = Recorder()
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(index: int):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = await operation(index)
+            except Exception:
+                ok = False
+            if ok:
+                recorder.add(time.perf_counter() - started)
+            else:
+                recorder.errors += 1
+
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    recorder.finished = time.perf_counter()
+    summary = recorder.summary()
+    print(f"  {name:<16} {summary['throughput_rps']:>9} req/s  p50 {summary['p50_ms']} ms  "
+          f"p99 {summary['p99_ms']} ms  errors {summary['errors']}", file=sys.stderr)
+    return summary
+
+
+def rest_operations(client: httpx.AsyncClient, fixtures: Fixtures, args) -> Dict[str, object]:
+    users = fixtures.users
+    payload = os.urandom(args.upload_bytes)
+
+    def user_for(index: int) -> dict:
+        return users[index % len(users)]
+
+    def channel_for(index: int) -> str:
+        return random.choice(fixtures.channel_ids)
+
+    async def login(index: int) -> bool:
+        response = await client.post(
+            "/api/v1/auth/login", json={"email": user_for(index)["email"], "password": PASSWORD}
+        )
+        return response.status_code == 200
+
+    async def list_channels(index: int) -> bool:
+        response = await client.get(
+            f"/api/v1/workspaces/{fixtures.workspace_id}/channels", headers=_auth(user_for(index)["token"])
+        )
+        return response.status_code == 200
+
+    async def list_messages(index: int) -> bool:
+        response = await client.get(
+            f"/api/v1/channels/{channel_for(index)}/messages",
+            params={"limit": args.page_size},
+            headers=_auth(user_for(index)["token"]),
+        )
+        return response.status_code == 200
+
+    async def create_message(index: int) -> bool:
+        response = await client.post(
+            f"/api/v1/channels/{channel_for(index)}/messages",
+            json={"content": f"load test {time.time()}", "type": "text"},
+            headers=_auth(user_for(index)["token"]),
+        )
+        return response.status_code == 200
+
+    async def upload(index: int) -> bool:
+        response = await client.post(
+            "/api/upload",
+            files={"file": ("load.bin", payload, "application/octet-stream")},
+            headers=_auth(user_for(index)["token"]),
+        )
+        return response.status_code == 200
+
+    async def download(index: int) -> bool:
+        stored_name = random.choice(fixtures.stored_names)
+        response = await client.get(f"/api/v1/download/{stored_name}")
+        return response.status_code == 200
+
+    return {
+        "login": login,
+        "list_channels": list_channels,
+        "list_messages": list_messages,
+        "create_message": create_message,
+        "upload": upload,
+        "download": download,
+    }
+
+
+# ============ WEBSOCKET FAN-OUT ============
+
+
+async def ws_fanout(fixtures: Fixtures, args) -> dict:
+    """
+    One publisher and `ws_subscribers` listeners on one channel. Every frame
+    carries its send time; each delivery's latency is recorded, so the
+    numbers cover the server's whole broadcast loop.
+    """
+    channel_id = fixtures.channel_ids[0]
+    base = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+
+    def url(user: dict) -> str:
+        return f"{base}/ws/channel/{channel_id}?token={user['token']}"
+
+    recorder = Recorder()
+    expected = args.ws_messages * args.ws_subscribers
+    delivered = asyncio.Event()
+    received = 0
+
+    async def listen(user: dict, ready: asyncio.Event):
+        nonlocal received
+        async with websockets.connect(url(user), max_queue=None) as ws:
+            ready.set()
+            async for raw in ws:
+                frame = json.loads(raw)
+                if frame.get("type") == "ping":
+                    await ws.send(json.dumps({"type": "pong"}))
+                    continue
+                if frame.get("type") != "loadtest":
+                    continue
+                recorder.add(time.perf_counter() - frame["sent_at"])
+                received += 1
+                if received >= expected:
+                    delivered.set()
+
+    subscribers = [fixtures.users[(i % (len(fixtures.users) - 1)) + 1] for i in range(args.ws_subscribers)]
+    ready_events = [asyncio.Event() for _ in subscribers]
+    listeners = [asyncio.create_task(listen(user, ready)) for user, ready in zip(subscribers, ready_events)]
+    await asyncio.wait_for(asyncio.gather(*(ready.wait() for ready in ready_events)), 30)
+
+    recorder.started = time.perf_counter()
+    interval = 1.0 / args.ws_rate if args.ws_rate > 0 else 0
+    async with websockets.connect(url(fixtures.users[0])) as publisher:
+        for i in range(args.ws_messages):
+            await publisher.send(json.dumps({"type": "loadtest", "n": i, "sent_at": time.perf_counter()}))
+            if interval:
+                await asyncio.sleep(interval)
+        try:
+            await asyncio.wait_for(delivered.wait(), args.ws_drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+    recorder.finished = time.perf_counter()
+
+    for task in listeners:
+        task.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+
+    recorder.errors = expected - received
+    summary = recorder.summary()
+    summary["subscribers"] = args.ws_subscribers
+    summary["messages"] = args.ws_messages
+    print(f"  {'ws_fanout':<16} {summary['throughput_rps']:>9} deliveries/s  p50 {summary['p50_ms']} ms  "
+          f"p99 {summary['p99_ms']} ms  missing {summary['errors']}", file=sys.stderr)
+    return summary
+
+
+# ============ COMMANDS ============
+
+
+async def run(args) -> dict:
+    scenarios = args.scenarios.split(",") if args.scenarios else SCENARIOS
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.users < 2:
+        raise SystemExit("--users must be at least 2 (publisher and subscribers)")
+    random.seed(args.seed)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        print(f"Seeding {args.users} users, {args.channels} channels, {args.seed_messages} messages...", file=sys.stderr)
+        fixtures = await seed(client, args)
+
+        print(f"Running {len(scenarios)} scenarios for {args.duration}s at concurrency {args.concurrency}", file=sys.stderr)
+        operations = rest_operations(client, fixtures, args)
+        results = {}
+        for name in scenarios:
+            if name == "ws_fanout":
+                results[name] = await ws_fanout(fixtures, args)
+            else:
+                results[name] = await _drive(name, operations[name], args)
+
+    return {
+        "meta": {
+            **_git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("func", "output")},
+        },
+        "results": results,
+    }
+
+
+def compare(args):
+    """Print per-scenario deltas between two result files"""
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before {(before['meta'].get('commit') or '?')[:10]}  after {(after['meta'].get('commit') or '?')[:10]}")
+    metrics = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms", "errors"]
+    print(f"{'scenario':<16}" + "".join(f"{metric:>22}" for metric in metrics))
+    for name in sorted(set(before["results"]) | set(after["results"])):
+        old = before["results"].get(name, {})
+        new = after["results"].get(name, {})
+        cells = []
+        for metric in metrics:
+            a, b = old.get(metric), new.get(metric)
+            if a is None or b is None:
+                cells.append(f"{'-':>22}")
+            elif a:
+                cells.append(f"{b:>12} ({(b - a) / a * 100:+6.1f}%)")
+            else:
+                cells.append(f"{b:>22}")
+        print(f"{name:<16}" + "".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TeamChat load test")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed fixtures and run scenarios")
+    run_parser.add_argument("--base-url", default="http://localhost:8000")
+    run_parser.add_argument("--scenarios", default=None, help=f"comma separated subset of {','.join(SCENARIOS)}")
+    run_parser.add_argument("--duration", type=float, default=20.0, help="seconds per REST scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--timeout", type=float, default=30.0)
+    run_parser.add_argument("--users", type=int, default=20)
+    run_parser.add_argument("--channels", type=int, default=4)
+    run_parser.add_argument("--seed-messages", type=int, default=500)
+    run_parser.add_argument("--page-size", type=int, default=50)
+    run_parser.add_argument("--upload-bytes", type=int, default=64 * 1024)
+    run_parser.add_argument("--workspace-id", default=None, help="run against an existing (bulk-loaded) workspace")
+    run_parser.add_argument("--channel-id", default=None, help="existing channel to use with --workspace-id")
+    run_parser.add_argument("--ws-subscribers", type=int, default=50)
+    run_parser.add_argument("--ws-messages", type=int, default=200)
+    run_parser.add_argument("--ws-rate", type=float, default=50.0, help="publisher frames per second, 0 = unthrottled")
+    run_parser.add_argument("--ws-drain-timeout", type=float, default=30.0)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("-o", "--output", default=None, help="write JSON here instead of stdout")
+
+    compare_parser = commands.add_parser("compare", help="diff two result files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args)
+        return
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Messages/sec through the single-message route versus the batch route.
+
+Posts --messages messages into a fresh channel once per mode: one request
+per message (POST /channels/{id}/messages), then in batches of each
+--batch-sizes entry (POST /channels/{id}/messages/batch), from
+--concurrency workers, and reports throughput and per-request latency as
+JSON stamped with the git commit.
+
+Run from backend/ against a server started with RATE_LIMIT_ENABLED=false,
+otherwise the per-user rate limits are what gets measured:
+
+    python -m benchmarks.message_batch --messages 5000 --batch-sizes 10,100,500
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+import httpx
+
+from .loadtest import _auth, _git_commit, _percentile, _register_and_login
+
+
+async def _setup(client: httpx.AsyncClient, workers: int):
+    """One user per worker, all members of one new channel"""
+    run_id = uuid.uuid4().hex[:8]
+    users = list(await asyncio.gather(*(
+        _register_and_login(client, f"batchbench-{run_id}-{i}@example.com", f"Batch Bench {i}")
+        for i in range(workers)
+    )))
+    owner = users[0]
+
+    response = await client.post(
+        "/api/v1/workspaces", json={"name": f"batchbench-{run_id}"}, headers=_auth(owner["token"])
+    )
+    response.raise_for_status()
+    response = await client.post(
+        f"/api/v1/workspaces/{response.json()['id']}/channels",
+        json={"name": f"batchbench-{run_id}", "is_public": True},
+        headers=_auth(owner["token"]),
+    )
+    response.raise_for_status()
+    channel_id = response.json()["id"]
+
+    for user in users[1:]:
+        (await client.post(f"/api/v1/channels/{channel_id}/join", headers=_auth(user["token"]))).raise_for_status()
+    return users, channel_id
+
+
+async def _measure(client: httpx.AsyncClient, users: List[dict], channel_id: str, total: int, batch_size: int) -> dict:
+    """Post `total` messages, `batch_size` per request (0: the single-message route)"""
+    per_request = batch_size or 1
+    requests = -(-total // per_request)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(index)
+
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(user: dict):
+        nonlocal errors
+        headers = _auth(user["token"])
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            first = index * per_request
+            count = min(per_request, total - first)
+            bodies = [{"content": f"bench message {first + i}", "type": "text"} for i in range(count)]
+
+            started = time.perf_counter()
+            try:
+                if batch_size:
+                    response = await client.post(
+                        f"/api/v1/channels/{channel_id}/messages/batch",
+                        json={"messages": bodies},
+                        headers=headers,
+                    )
+                else:
+                    response = await client.post(
+                        f"/api/v1/channels/{channel_id}/messages", json=bodies[0], headers=headers
+                    )
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code == 429:
+                raise SystemExit("Rate limited: restart the server with RATE_LIMIT_ENABLED=false")
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user) for user in users))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "batch_size": batch_size or 1,
+        "route": "batch" if batch_size else "single",
+        "messages": total,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(total / elapsed, 1) if elapsed else None,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+    }
+
+
+async def run(args) -> dict:
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",") if size]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        users, channel_id = await _setup(client, args.concurrency)
+        results = []
+        for batch_size in [0, *batch_sizes]:
+            print(f"Posting {args.messages} messages, batch size {batch_size or 'single'}...", file=sys.stderr)
+            results.append(await _measure(client, users, channel_id, args.messages, batch_size))
+
+    single = results[0]["messages_per_second"]
+    for result in results:
+        if single and result["messages_per_second"]:
+            result["speedup"] = round(result["messages_per_second"] / single, 2)
+
+    return {
+        "meta": {
+            **_git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs batch message send throughput")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--messages", type=int, default=2000, help="messages posted per mode")
+    parser.add_argument("--batch-sizes", default="10,100,500", help="comma separated batch sizes to compare")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("-o", "--output", default=None, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Connection churn benchmark for ConnectionManager.
+
+Opens N fake sockets spread over a few channels, broadcasts while sockets
+come and go, and reports how long connect/disconnect/broadcast take. With
+the old list registry disconnect time grew with channel size; it should
+now stay flat as --connections grows.
+
+Run from backend/:  python -m benchmarks.ws_registry_churn --connections 5000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from app.websocket import ConnectionManager
+
+
+class FakeWebSocket:
+    """Just enough of starlette's WebSocket for the manager"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.sent += 1
+
+    async def close(self, code: int = 1000, reason: str = None):
+        pass
+
+
+async def run(connections: int, channels: int, broadcasts: int, seed: int) -> dict:
+    random.seed(seed)
+    manager = ConnectionManager(heartbeat_interval=3600)
+    channel_ids = [uuid.uuid4() for _ in range(channels)]
+    user_ids = [uuid.uuid4() for _ in range(max(1, connections // 2))]
+    sockets = []
+
+    start = time.perf_counter()
+    for _ in range(connections):
+        ws = FakeWebSocket()
+        await manager.connect(ws, random.choice(channel_ids), random.choice(user_ids))
+        sockets.append(ws)
+    connect_time = time.perf_counter() - start
+
+    # Broadcasts interleaved with churn: every broadcast half a percent of
+    # the sockets leave and are replaced
+    churn = max(1, connections // 200)
+    broadcast_time = 0.0
+    churn_time = 0.0
+    for _ in range(broadcasts):
+        channel_id = random.choice(channel_ids)
+        t0 = time.perf_counter()
+        await manager.broadcast_to_channel({"type": "message", "content": "x"}, channel_id, exclude=sockets[0])
+        broadcast_time += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for _ in range(churn):
+            index = random.randrange(len(sockets))
+            manager.disconnect(sockets[index])
+            ws = FakeWebSocket()
+            await manager.connect(ws, random.choice(channel_ids), random.choice(user_ids))
+            sockets[index] = ws
+        churn_time += time.perf_counter() - t0
+
+    random.shuffle(sockets)
+    start = time.perf_counter()
+    for ws in sockets:
+        manager.disconnect(ws)
+    disconnect_time = time.perf_counter() - start
+
+    await manager.stop_heartbeat()
+    assert manager.stats()["connections"] == 0
+
+    return {
+        "connections": connections,
+        "channels": channels,
+        "broadcasts": broadcasts,
+        "connect_us_per_socket": connect_time / connections * 1e6,
+        "disconnect_us_per_socket": disconnect_time / connections * 1e6,
+        "churn_us_per_reconnect": churn_time / (broadcasts * churn) * 1e6 if broadcasts else 0.0,
+        "broadcast_ms_avg": broadcast_time / broadcasts * 1e3 if broadcasts else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=5000)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--broadcasts", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.connections, args.channels, args.broadcasts, args.seed))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Bring the database schema up to date. Run once per deploy before starting
+the API workers (the start scripts, Dockerfile and docker-compose do):
+
+    python migrate.py
+
+The alembic history starts from an already-populated schema, so an empty
+database is created from the models and stamped at head; any other
+database is upgraded with `alembic upgrade head`.
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.config import settings
+from app.database import engine, Base
+from app import models  # noqa: F401  registers every table on Base.metadata
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+def main():
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    # configparser interpolation: a literal % in the password must be doubled
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+    tables = set(inspect(engine).get_table_names())
+    if not tables:
+        print("[MIGRATE] Empty database: creating schema from models and stamping head")
+        Base.metadata.create_all(bind=engine)
+        command.stamp(config, "head")
+    else:
+        print("[MIGRATE] Upgrading schema to head")
+        command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    main()
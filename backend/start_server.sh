@@ -5,5 +5,6 @@ echo "Using virtual environment: ../.venv"
 echo ""
 
 cd "$(dirname "$0")"
+../.venv/bin/python migrate.py || exit 1
 ../.venv/bin/python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
 
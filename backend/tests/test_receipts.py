@@ -0,0 +1,104 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from app.models import User, Workspace, Channel, ChannelMember, HiddenMessage, Message
+from app.receipts import ReceiptTracker, READ, DELIVERED
+
+
+class FakeManager:
+    """Collects the frames a flush would broadcast"""
+
+    loop = None
+
+    def __init__(self):
+        self.frames = []
+
+    async def broadcast_ephemeral(self, text, channel_id):
+        self.frames.append((channel_id, text))
+
+
+def _channel_with_messages(db, count):
+    """A channel where `author` posted `count` messages `reader` has not read"""
+    suffix = uuid.uuid4().hex[:8]
+    workspace = Workspace(name=f"receipts-{suffix}")
+    db.add(workspace)
+    db.flush()
+    author = User(email=f"author-{suffix}@example.com", password_hash="x", name="Author", workspace_id=workspace.id)
+    reader = User(email=f"reader-{suffix}@example.com", password_hash="x", name="Reader", workspace_id=workspace.id)
+    db.add_all([author, reader])
+    db.flush()
+
+    start = datetime.utcnow() - timedelta(minutes=10)
+    channel = Channel(workspace_id=workspace.id, name=f"receipts-{suffix}", created_by=author.id, member_count=2)
+    db.add(channel)
+    db.flush()
+    messages = [
+        Message(channel_id=channel.id, user_id=author.id, content=f"message {i}", created_at=start + timedelta(minutes=i))
+        for i in range(count)
+    ]
+    db.add_all(messages)
+    channel.last_message_at = messages[-1].created_at
+    db.add_all([
+        ChannelMember(channel_id=channel.id, user_id=author.id, role="admin", joined_at=start, unread_count=0),
+        ChannelMember(channel_id=channel.id, user_id=reader.id, joined_at=start, unread_count=count),
+    ])
+    db.commit()
+    return channel, author, reader, messages
+
+
+def _member(db, channel, user):
+    db.expire_all()
+    return db.query(ChannelMember).filter(
+        ChannelMember.channel_id == channel.id,
+        ChannelMember.user_id == user.id,
+    ).one()
+
+
+def test_flush_to_newest_message_clears_badge(db):
+    channel, author, reader, messages = _channel_with_messages(db, 3)
+    manager = FakeManager()
+    tracker = ReceiptTracker(manager)
+
+    tracker.ack(channel.id, reader.id, READ, messages[-1].created_at)
+    asyncio.run(tracker.flush())
+
+    member = _member(db, channel, reader)
+    assert member.unread_count == 0
+    assert member.last_read_message_at == messages[-1].created_at
+    assert member.last_delivered_at == messages[-1].created_at
+    assert tracker.pending == {}
+    assert tracker.counters["flushes"] == 1
+    assert [channel_id for channel_id, _ in manager.frames] == [channel.id]
+
+
+def test_flush_recounts_unread_after_an_older_mark(db):
+    channel, author, reader, messages = _channel_with_messages(db, 4)
+    # Hidden messages are not on the badge
+    db.add(HiddenMessage(user_id=reader.id, message_id=messages[3].id))
+    db.commit()
+    tracker = ReceiptTracker(FakeManager())
+
+    tracker.ack(channel.id, reader.id, READ, messages[1].created_at)
+    tracker.ack(channel.id, reader.id, DELIVERED, messages[3].created_at)
+    asyncio.run(tracker.flush())
+
+    member = _member(db, channel, reader)
+    assert member.unread_count == 1
+    assert member.last_read_message_at == messages[1].created_at
+    assert member.last_delivered_at == messages[3].created_at
+
+
+def test_failed_flush_keeps_acks(db, monkeypatch):
+    channel, author, reader, messages = _channel_with_messages(db, 1)
+    tracker = ReceiptTracker(FakeManager())
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(ReceiptTracker, "_statement", staticmethod(broken))
+    tracker.ack(channel.id, reader.id, READ, messages[0].created_at)
+    asyncio.run(tracker.flush())
+
+    assert tracker.pending == {(channel.id, reader.id): [None, messages[0].created_at]}
+    assert _member(db, channel, reader).unread_count == 1
@@ -3,6 +3,25 @@ import { formatDistanceToNow } from 'date-fns';
 import { channelAPI } from '../services/api';
 import { ChannelDiscovery } from './ChannelDiscovery';  // ✅ ADD THIS IMPORT
 
+// Stands in for the text of a message that only carries an attachment
+const fileLabel = (fileType) => {
+  if (fileType.startsWith('image/')) return '📷 Photo';
+  if (fileType.startsWith('video/')) return '🎥 Video';
+  if (fileType.startsWith('audio/')) return '🎵 Audio';
+  return '📎 File';
+};
+
+// "author: snippet" of the newest message, from the channel list response
+const lastMessagePreview = (channel) => {
+  const snippet =
+    channel.last_message_preview ||
+    (channel.last_message_file_type ? fileLabel(channel.last_message_file_type) : null);
+  if (!snippet) return channel.description || 'No messages yet';
+  return channel.last_message_user_name
+    ? `${channel.last_message_user_name}: ${snippet}`
+    : snippet;
+};
+
 export const ChatList = ({
   channels,
   selectedChannel,
@@ -170,7 +189,7 @@ export const ChatList = ({
                 </div>
                 <div className="flex items-center justify-between">
                   <p className="text-sm text-gray-600 truncate">
-                    {channel.description || 'No messages yet'}
+                    {lastMessagePreview(channel)}
                   </p>
                   {channel.unread_count > 0 && (
                     <span className="ml-2 bg-teal-500 text-white text-xs font-bold px-2 py-0.5 rounded-full flex-shrink-0">
@@ -33,6 +33,11 @@ export const ChatWindow = ({ channel, onBack, allChannels = [] }) => {
   // Toast / snackbar
   const [toast, setToast] = useState(null);
 
+  // Typing indicator: userId -> expiry timestamp, fed by coalesced presence frames
+  const [typingUsers, setTypingUsers] = useState({});
+  const lastTypingSentRef = useRef(0);
+  const latestMessageRef = useRef(null);
+
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null);
   const messageRefs = useRef({});
@@ -57,12 +62,135 @@ export const ChatWindow = ({ channel, onBack, allChannels = [] }) => {
           if (exists) return prev;
           return [...prev, newMessage.data];
         });
+        sendReadReceipt(newMessage.data);
+      } else if (newMessage.type === 'messages') {
+        // One frame per batch send
+        setMessages((prev) => {
+          const seen = new Set(prev.map((msg) => msg.id));
+          const added = newMessage.data.filter((msg) => !seen.has(msg.id));
+          return added.length ? [...prev, ...added] : prev;
+        });
+        sendReadReceipt(newMessage.data[newMessage.data.length - 1]);
       } else if (newMessage.type === 'connected') {
         console.log('WebSocket connected:', newMessage.message);
+        // Messages may have loaded before the socket opened
+        sendReadReceipt(latestMessageRef.current);
+      } else if (newMessage.type === 'resync_required') {
+        // Missed frames are no longer buffered server-side; refetch instead
+        loadMessages();
+      } else if (newMessage.type === 'presence') {
+        handlePresence(newMessage);
+      } else if (newMessage.type === 'receipts') {
+        handleReceipts(newMessage);
+      } else if (newMessage.type === 'reaction') {
+        applyReaction(
+          newMessage.message_id,
+          newMessage.emoji,
+          newMessage.count,
+          newMessage.user_id === currentUserId ? newMessage.action === 'added' : undefined
+        );
       }
     }
   );
 
+  const handlePresence = (frame) => {
+    setTypingUsers((prev) => {
+      const next = { ...prev };
+      const expiresAt = Date.now() + (frame.typing_ttl_ms || 6000);
+      (frame.typing || []).forEach((id) => {
+        if (id !== currentUserId) next[id] = expiresAt;
+      });
+      [...(frame.stopped_typing || []), ...(frame.offline || [])].forEach((id) => {
+        delete next[id];
+      });
+      return next;
+    });
+  };
+
+  // Drop typing entries whose sender went quiet without a stop notice
+  useEffect(() => {
+    if (Object.keys(typingUsers).length === 0) return;
+    const timer = setInterval(() => {
+      const now = Date.now();
+      setTypingUsers((prev) => {
+        const next = Object.fromEntries(
+          Object.entries(prev).filter(([, expiresAt]) => expiresAt > now)
+        );
+        return Object.keys(next).length === Object.keys(prev).length ? prev : next;
+      });
+    }, 1000);
+    return () => clearInterval(timer);
+  }, [typingUsers]);
+
+  // The server rate limits these too; re-announce while typing continues
+  const notifyTyping = () => {
+    const now = Date.now();
+    if (isConnected && now - lastTypingSentRef.current > 2000) {
+      lastTypingSentRef.current = now;
+      sendWS({ type: 'typing', typing: true });
+    }
+  };
+
+  const typingCount = Object.keys(typingUsers).length;
+
+  // Reaction deltas carry the absolute count, so applying one twice is harmless.
+  // `reacted` is only known for our own changes; undefined keeps the old flag.
+  const applyReaction = (messageId, emoji, count, reacted) => {
+    setMessages((prev) =>
+      prev.map((msg) => {
+        if (msg.id !== messageId) return msg;
+        const reactions = msg.reactions || [];
+        const existing = reactions.find((r) => r.emoji === emoji);
+        const updated = {
+          emoji,
+          count,
+          reacted: reacted === undefined ? !!existing?.reacted : reacted,
+        };
+        const next = existing
+          ? reactions.map((r) => (r.emoji === emoji ? updated : r))
+          : [...reactions, updated];
+        return { ...msg, reactions: next.filter((r) => r.count > 0) };
+      })
+    );
+  };
+
+  const handleToggleReaction = async (msg, emoji, reacted) => {
+    try {
+      const response = reacted
+        ? await messageAPI.removeReaction(msg.id, emoji)
+        : await messageAPI.addReaction(msg.id, emoji);
+      applyReaction(msg.id, emoji, response.data.count, response.data.reacted);
+    } catch (error) {
+      console.error('Error updating reaction:', error);
+      showToast('error', 'Failed to update reaction.');
+    }
+  };
+
+  // The server batches these into one high-water mark per member
+  const sendReadReceipt = (message) => {
+    if (!message?.created_at) return;
+    sendWS({ type: 'receipt', status: 'read', up_to: message.created_at });
+  };
+
+  // Channel-wide watermarks: everything at or before them reached everyone
+  const handleReceipts = (frame) => {
+    const deliveredThrough = frame.delivered_through ? new Date(frame.delivered_through) : null;
+    const readThrough = frame.read_through ? new Date(frame.read_through) : null;
+    setMessages((prev) =>
+      prev.map((msg) => {
+        if (msg.user_id !== currentUserId) return msg;
+        const createdAt = new Date(msg.created_at);
+        const status =
+          readThrough && createdAt <= readThrough
+            ? 'read'
+            : deliveredThrough && createdAt <= deliveredThrough
+            ? 'delivered'
+            : msg.delivery_status;
+        return status === msg.delivery_status ? msg : { ...msg, delivery_status: status };
+      })
+    );
+  };
+
   useEffect(() => {
     if (channel?.id) {
       loadMessages();
@@ -79,17 +207,28 @@ export const ChatWindow = ({ channel, onBack, allChannels = [] }) => {
     } else {
       setMessages([]);
     }
+    setTypingUsers({});
+    lastTypingSentRef.current = 0;
   }, [channel?.id]);
 
   useEffect(() => {
     scrollToBottom();
+    latestMessageRef.current = messages[messages.length - 1] || null;
   }, [messages]);
 
   const loadMessages = async () => {
     try {
       console.log('Loading messages for channel:', channel.id);
       const response = await messageAPI.list(channel.id);
-      setMessages(response.data || []);
+      const loaded = response.data || [];
+      setMessages(loaded);
+      if (loaded.length > 0) {
+        sendReadReceipt(loaded[loaded.length - 1]);
+      }
+      // Opening the channel clears its badge, even before the socket connects
+      channelAPI.markRead(channel.id).catch((error) => {
+        console.error('Error marking channel read:', error);
+      });
     } catch (error) {
       console.error('Error loading messages:', error);
       showToast('error', 'Failed to load messages.');
@@ -220,11 +359,13 @@ export const ChatWindow = ({ channel, onBack, allChannels = [] }) => {
       });
 
       if (isConnected) {
+        // Also clears our typing indicator on the server
         sendWS({
           type: 'message',
           data: newMessage,
         });
       }
+      lastTypingSentRef.current = 0;
 
       setInputValue('');
       setReplyTo(null);
@@ -383,7 +524,13 @@ export const ChatWindow = ({ channel, onBack, allChannels = [] }) => {
           <h2 className="font-semibold text-gray-900">{channel.name}</h2>
           <div className="flex items-center gap-1 text-xs text-gray-500">
             <span className={isConnected ? 'text-green-600' : ''}>
-              {isConnected ? 'Online' : 'Connecting...'}
+              {!isConnected
+                ? 'Connecting...'
+                : typingCount === 1
+                ? 'Someone is typing...'
+                : typingCount > 1
+                ? `${typingCount} people are typing...`
+                : 'Online'}
             </span>
             {memberCount > 0 && (
               <>
@@ -466,6 +613,7 @@ export const ChatWindow = ({ channel, onBack, allChannels = [] }) => {
                 onDeleteForMe={handleDeleteMessageForMe}
                 onDeleteForEveryone={handleDeleteMessageForEveryone}
                 onForward={handleForwardMessage}
+                onToggleReaction={handleToggleReaction}
               />
             </div>
           );
@@ -559,7 +707,10 @@ export const ChatWindow = ({ channel, onBack, allChannels = [] }) => {
             <input
               type="text"
               value={inputValue}
-              onChange={(e) => setInputValue(e.target.value)}
+              onChange={(e) => {
+                setInputValue(e.target.value);
+                if (e.target.value) notifyTyping();
+              }}
               onKeyDown={(e) => {
                 if (e.key === 'Enter' && !e.shiftKey) {
                   e.preventDefault();
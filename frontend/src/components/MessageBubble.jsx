@@ -5,6 +5,7 @@ import { Download, FileText, File as FileIcon } from 'lucide-react';
 const FILE_BASE_URL = 'http://localhost:8000';
 const MAX_REPLY_CHARS = 80;
 const MAX_FILENAME_CHARS = 40;
+const QUICK_REACTIONS = ['👍', '❤️', '😂'];
 
 function getFullFileUrl(fileUrl) {
   if (!fileUrl) return null;
@@ -27,6 +28,7 @@ export const MessageBubble = ({
   onDeleteForMe,
   onDeleteForEveryone,
   onForward,
+  onToggleReaction,
 }) => {
   const [showActions, setShowActions] = useState(false);
   const [timeAgo, setTimeAgo] = useState('');
@@ -255,8 +257,39 @@ export const MessageBubble = ({
           </div>
         </div>
 
+        {message.reactions?.length > 0 && (
+          <div className={`flex flex-wrap gap-1 mt-1 ${isOwn ? 'justify-end' : ''}`}>
+            {message.reactions.map((reaction) => (
+              <button
+                key={reaction.emoji}
+                onClick={() => onToggleReaction && onToggleReaction(message, reaction.emoji, reaction.reacted)}
+                className={`px-2 py-0.5 rounded-full text-xs border transition-colors ${
+                  reaction.reacted
+                    ? 'bg-teal-50 border-teal-300 text-teal-700'
+                    : 'bg-white border-gray-200 text-gray-600 hover:border-gray-300'
+                }`}
+              >
+                {reaction.emoji} {reaction.count}
+              </button>
+            ))}
+          </div>
+        )}
+
         {showActions && (
           <div className="flex flex-wrap gap-2 mt-1 px-2">
+            {QUICK_REACTIONS.map((emoji) => {
+              const reacted = message.reactions?.some((r) => r.emoji === emoji && r.reacted);
+              return (
+                <button
+                  key={emoji}
+                  onClick={() => onToggleReaction && onToggleReaction(message, emoji, reacted)}
+                  className="text-xs text-gray-500 hover:scale-110 transition-transform"
+                >
+                  {emoji}
+                </button>
+              );
+            })}
+
             <button
               onClick={handleConvertToIdea}
               className="text-xs text-gray-500 hover:text-purple-600 flex items-center gap-1 transition-colors"
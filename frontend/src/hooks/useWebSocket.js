@@ -6,6 +6,10 @@ export const useWebSocket = (channelId, onMessage) => {
   const wsRef = useRef(null);
   const reconnectTimeoutRef = useRef(null);
   const reconnectAttemptsRef = useRef(0);
+  // Last broadcast sequence seen and the server epoch it belongs to, used to
+  // resume after a drop without refetching
+  const lastSeqRef = useRef(null);
+  const epochRef = useRef(null);
   const maxReconnectAttempts = 5;
 
   useEffect(() => {
@@ -24,7 +28,13 @@ export const useWebSocket = (channelId, onMessage) => {
 
     const connect = () => {
       try {
-        const wsUrl = `ws://localhost:8000/ws/channel/${channelId}`;
+        const params = new URLSearchParams();
+        params.set('token', localStorage.getItem('token') || '');
+        if (lastSeqRef.current !== null && epochRef.current) {
+          params.set('resume_from', lastSeqRef.current);
+          params.set('epoch', epochRef.current);
+        }
+        const wsUrl = `ws://localhost:8000/ws/channel/${channelId}?${params.toString()}`;
         console.log('Attempting WebSocket connection to:', wsUrl);
         const ws = new WebSocket(wsUrl);
 
@@ -38,10 +48,28 @@ export const useWebSocket = (channelId, onMessage) => {
         ws.onmessage = (event) => {
           try {
             const data = JSON.parse(event.data);
+
+            // Server heartbeat: answer so the connection isn't reaped as idle
+            if (data.type === 'ping') {
+              ws.send(JSON.stringify({ type: 'pong' }));
+              return;
+            }
+
             console.log('WebSocket message received:', data);
             
             if (data.type === 'connected') {
               console.log('WebSocket connection confirmed:', data.message);
+              if (epochRef.current !== data.epoch) {
+                epochRef.current = data.epoch;
+                lastSeqRef.current = data.seq;
+              }
+            } else if (data.type === 'resync_required') {
+              lastSeqRef.current = data.seq;
+            } else if (typeof data.seq === 'number') {
+              lastSeqRef.current = data.seq;
+              if (data.type === 'ack') {
+                return;
+              }
             }
             
             if (onMessage) {
@@ -62,7 +90,10 @@ export const useWebSocket = (channelId, onMessage) => {
           setIsConnected(false);
           console.log('WebSocket closed:', event.code, event.reason);
           
-          if (event.code !== 1000 && reconnectAttemptsRef.current < maxReconnectAttempts) {
+          // 1008: rejected (bad token / not a member); retrying won't help
+          if (event.code === 1008) {
+            setConnectionError(event.reason || 'Not allowed');
+          } else if (event.code !== 1000 && reconnectAttemptsRef.current < maxReconnectAttempts) {
             reconnectAttemptsRef.current++;
             console.log(`Reconnecting... (attempt ${reconnectAttemptsRef.current}/${maxReconnectAttempts})`);
             reconnectTimeoutRef.current = setTimeout(() => {
@@ -93,6 +124,8 @@ export const useWebSocket = (channelId, onMessage) => {
       setIsConnected(false);
       setConnectionError(null);
       reconnectAttemptsRef.current = 0;
+      lastSeqRef.current = null;
+      epochRef.current = null;
     };
   }, [channelId]); // CHANGED: Removed onMessage from dependencies
 
@@ -2,8 +2,12 @@ import React, { useState, useEffect } from 'react';
 import { ideasAPI } from '../services/api';
 import { BottomNav } from '../components/BottomNav';
 
+const IDEAS_PAGE_SIZE = 50;
+
 export const Ideas = () => {
   const [ideas, setIdeas] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [statusCounts, setStatusCounts] = useState({});
   const [filter, setFilter] = useState('all');
   const [selectedIdea, setSelectedIdea] = useState(null);
   const workspaceId = localStorage.getItem('workspaceId');
@@ -12,17 +16,45 @@ export const Ideas = () => {
     loadIdeas();
   }, [filter]);
 
-  const loadIdeas = async () => {
+  useEffect(() => {
+    loadFacets();
+  }, []);
+
+  // Without a cursor, replaces the list with the first page
+  const loadIdeas = async (cursor = null) => {
     try {
-      const response = await ideasAPI.getAll(workspaceId, {
-        status: filter !== 'all' ? filter : null
+      const response = await ideasAPI.getPage(workspaceId, {
+        status: filter !== 'all' ? filter : null,
+        cursor,
+        limit: IDEAS_PAGE_SIZE,
       });
-      setIdeas(response.data);
+      const { ideas: page, next_cursor } = response.data;
+      setIdeas((prev) => (cursor ? [...prev, ...page] : page));
+      setNextCursor(next_cursor);
     } catch (error) {
       console.error('Error loading ideas:', error);
     }
   };
 
+  // Counts for the filter buttons, computed server-side
+  const loadFacets = async () => {
+    try {
+      const response = await ideasAPI.getFacets(workspaceId);
+      const counts = { all: response.data.total };
+      response.data.status.forEach(({ value, count }) => {
+        if (value) counts[value] = count;
+      });
+      setStatusCounts(counts);
+    } catch (error) {
+      console.error('Error loading idea counts:', error);
+    }
+  };
+
+  const reload = () => {
+    loadIdeas();
+    loadFacets();
+  };
+
   const getCategoryEmoji = (category) => {
     const emojis = {
       blog: '📝',
@@ -61,6 +93,9 @@ export const Ideas = () => {
               }`}
             >
               {status === 'all' ? 'All Ideas' : status.replace('_', ' ')}
+              {statusCounts[status] !== undefined && (
+                <span className="ml-1 opacity-75">({statusCounts[status]})</span>
+              )}
             </button>
           ))}
         </div>
@@ -124,6 +159,17 @@ export const Ideas = () => {
           ))}
         </div>
 
+        {nextCursor && (
+          <div className="text-center mt-4">
+            <button
+              onClick={() => loadIdeas(nextCursor)}
+              className="px-4 py-2 border rounded-lg text-sm text-gray-700 hover:bg-gray-100"
+            >
+              Load more
+            </button>
+          </div>
+        )}
+
         {ideas.length === 0 && (
           <div className="text-center py-12">
             <div className="text-6xl mb-4">💡</div>
@@ -137,7 +183,7 @@ export const Ideas = () => {
         <IdeaDetailModal
           idea={selectedIdea}
           onClose={() => setSelectedIdea(null)}
-          onUpdate={loadIdeas}
+          onUpdate={reload}
         />
       )}
 
@@ -52,6 +52,10 @@ export const channelAPI = {
   clearMessages: (channelId) =>
     api.post(`/channels/${channelId}/clear`),
 
+  // Resets the unread badge of the channel for the current user
+  markRead: (channelId) =>
+    api.post(`/channels/${channelId}/read`),
+
   // ✅ NEW: Channel discovery and membership
   discover: (search = '') =>
     api.get(`/channels/discover${search ? `?search=${search}` : ''}`),
@@ -71,6 +75,10 @@ export const messageAPI = {
   create: (channelId, payload) =>
     api.post(`/channels/${channelId}/messages`, payload),
 
+  // messages: array of create payloads, stored in order
+  createBatch: (channelId, messages) =>
+    api.post(`/channels/${channelId}/messages/batch`, { messages }),
+
   list: (channelId, skip = 0, limit = 50) =>
     api.get(`/channels/${channelId}/messages?skip=${skip}&limit=${limit}`),
 
@@ -83,6 +91,9 @@ export const messageAPI = {
   addReaction: (messageId, emoji) =>
     api.post(`/messages/${messageId}/reactions`, { emoji }),
 
+  removeReaction: (messageId, emoji) =>
+    api.delete(`/messages/${messageId}/reactions`, { params: { emoji } }),
+
   convertToIdea: (messageId) =>
     api.post(`/messages/${messageId}/convert-to-idea`),
 
@@ -141,6 +152,19 @@ export const ideasAPI = {
     if (filters.priority) params.append('priority', filters.priority);
     return api.get(`/workspaces/${workspaceId}/ideas?${params}`);
   },
+  getPage: (workspaceId, filters = {}) => {
+    const params = new URLSearchParams();
+    if (filters.status) params.append('status', filters.status);
+    if (filters.category) params.append('category', filters.category);
+    if (filters.priority) params.append('priority', filters.priority);
+    if (filters.cursor) params.append('cursor', filters.cursor);
+    if (filters.limit) params.append('limit', filters.limit);
+    // -> { ideas, next_cursor }
+    return api.get(`/workspaces/${workspaceId}/ideas/page?${params}`);
+  },
+  // -> { total, status, category, priority }, each a list of { value, count }
+  getFacets: (workspaceId) =>
+    api.get(`/workspaces/${workspaceId}/ideas/facets`),
   update: (ideaId, data) =>
     api.patch(`/ideas/${ideaId}`, data),
   delete: (ideaId) =>